@@ -1,9 +1,51 @@
+"""
+Exposes the names of all the submodules, importing each submodule only when one of its names is first used.
 
-from basics.helpp import *
-from basics.io_name import *
-from basics.itertools import *
-from basics.math_name import *
-from basics.misc import *
-from basics.objectify import *
-from basics.python import *
-from basics.imports import *
+``from basics import read`` only imports `basics.io_name`, while ``from basics import *`` imports everything.
+A name that several submodules export is taken from the submodule that defines it.
+"""
+import importlib as _importlib
+
+_SUBMODULE_NAMES = {
+    'helpp': ['helpp', 'helppp', 'helpppp'],
+    'io_name': ['InputReader', 'read', 'read_lines', 'write', 'write_lines'],
+    'itertools': ['Indexable', 'IndexableMixin', 'consume', 'first', 'flatten', 'groupby', 'indexify',
+                  'indexify_no_args', 'merge_sorted', 'non_unique', 'nth', 'progress_bar_iter', 'split_list',
+                  'split_true_false', 'sub_sets', 'sublists', 'transpose'],
+    'math_name': ['average', 'digits', 'divisor_count', 'divisors', 'factors', 'fibs', 'gcd', 'is_prime', 'isqrt',
+                  'lcm', 'long_division', 'math_product', 'over', 'primes', 'rotations', 'sum_mod'],
+    'misc': ['Stopwatch', 'bits', 'google_code', 'is_palindrome', 'is_printable', 'jagged_to_square', 're_strip',
+             'xor_bytes'],
+    'objectify': ['ObjectDict', 'ObjectList', 'objectify', 'unobjectify'],
+    'python': ['dictify', 'find_attrs', 'formatt', 'lazy_property', 'log_call_detailed', 'log_calls', 'memoize',
+               'print_function', 'printt', 'remove_modules', 'safe_getattrs', 'slots'],
+    'imports': ['Counter', 'Decimal', 'Enum', 'Fraction', 'absolute_import', 'ascii_lowercase', 'ascii_uppercase',
+                'ceil', 'combinations', 'count', 'dropwhile', 'factorial', 'glob', 'hexlify', 'islice', 'namedtuple',
+                'partial', 'permutations', 'pformat', 'pprint', 'product', 'sleep', 'sqrt', 'takewhile',
+                'unhexlify'],
+}
+
+_SUBMODULE_OF = {name: submodule for submodule, names in _SUBMODULE_NAMES.items() for name in names}
+
+__all__ = sorted(_SUBMODULE_OF)
+
+
+def __getattr__(name):
+    submodule = _SUBMODULE_OF.get(name)
+    if submodule is None:
+        if name in _SUBMODULE_NAMES:
+            return _importlib.import_module('.' + name, __name__)
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    module = _importlib.import_module('.' + submodule, __name__)
+    # Importing the submodule binds it as an attribute of the package, but like with a star import the names
+    # it exports take precedence (e.g. the `objectify` function over the `basics.objectify` module).
+    if submodule in _SUBMODULE_OF:
+        globals()[submodule] = getattr(module, submodule)
+    value = getattr(module, name)
+    # Cache it, so __getattr__ is only called once per name.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULE_NAMES))
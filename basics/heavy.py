@@ -1,31 +1,99 @@
+"""
+Helpers for interactive sessions, with the usual heavy libraries at hand.
+
+The libraries (``np``, ``pandas``, ``nx``, ``plt``, ``sympy``, ``requests`` and the IPython helpers) are
+stand-ins that import the real thing on first use, so importing this module takes no time and the helpers that
+don't need a library (e.g. `sub_rows`) work even when it isn't installed. Call `preload` to import them all
+up front.
+"""
 from __future__ import absolute_import
 
+import functools
+import importlib as _importlib
+import logging
+import pdb
+import socket
+
 from basics import *
 
-logging.info('req')
-import requests
-logging.info('np')
-import numpy as np
-logging.info('pandas')
-import pandas
-logging.info('nx')
-import networkx as nx
-logging.info('plt')
-import matplotlib.pyplot as plt
-logging.info('sympy')
-import sympy
-logging.info('ipython')
-from IPython import embed, start_ipython
-logging.info('display')
-from IPython.display import display
-logging.info('socket')
-import socket
 socket.setdefaulttimeout(5)
 del socket
 
-from IPython.core.debugger import Pdb
-ipdb = Pdb()
-del Pdb
+_UNSET = object()
+
+
+class _Lazy(object):
+    """
+    A stand-in for the object `factory` returns, which is only called when the object is first used.
+    Once created, the object also replaces the stand-in in this module's namespace.
+
+    Special attributes such as ``__version__`` don't count as a use, but are passed on once the object is created.
+
+    >>> lazy_np = _lazy_import('np', 'numpy')
+    >>> hasattr(lazy_np, '__version__')
+    False
+    >>> lazy_np.zeros(2).tolist()
+    [0.0, 0.0]
+    >>> lazy_np.__name__, lazy_np.__version__ == lazy_np.version.version
+    ('numpy', True)
+    """
+    __slots__ = ('_name', '_factory', '_obj')
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._obj = _UNSET
+
+    def _resolve(self):
+        if self._obj is _UNSET:
+            logging.info('loading %s', self._name)
+            self._obj = self._factory()
+            globals()[self._name] = self._obj
+        return self._obj
+
+    def __getattr__(self, attr):
+        # Introspection (e.g. doctest looking for ``__wrapped__``) shouldn't import anything.
+        if self._obj is _UNSET and attr.startswith('__') and attr.endswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._resolve(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self._resolve())
+
+    def __repr__(self):
+        if self._obj is _UNSET:
+            return '<not yet loaded {}>'.format(self._name)
+        return repr(self._obj)
+
+
+def _lazy_import(name, module_name, attr=None):
+    def factory():
+        module = _importlib.import_module(module_name)
+        return module if attr is None else getattr(module, attr)
+    return _Lazy(name, factory)
+
+
+requests = _lazy_import('requests', 'requests')
+np = _lazy_import('np', 'numpy')
+pandas = _lazy_import('pandas', 'pandas')
+nx = _lazy_import('nx', 'networkx')
+plt = _lazy_import('plt', 'matplotlib.pyplot')
+sympy = _lazy_import('sympy', 'sympy')
+embed = _lazy_import('embed', 'IPython', 'embed')
+start_ipython = _lazy_import('start_ipython', 'IPython', 'start_ipython')
+display = _lazy_import('display', 'IPython.display', 'display')
+ipdb = _Lazy('ipdb', lambda: _importlib.import_module('IPython.core.debugger').Pdb())
+
+
+def preload():
+    """Import all the heavy libraries now instead of on first use."""
+    for value in list(globals().values()):
+        if isinstance(value, _Lazy):
+            value._resolve()
+
 
 # sympy.init_printing()
 
@@ -104,63 +172,126 @@ def graph_calls(**kwargs):
     return _deco
 
 
+def row_windows(arr, sub_size):
+    """
+    Return all sub-rows of length `sub_size` in the 2d numpy array `arr` as a read-only view without copying.
+
+    Args:
+        arr: A 2d numpy array. ``arr[0, 0]`` is considered the top-left corner.
+        sub_size: The length of the sub-rows.
+
+    Returns:
+        A 3d array in which ``[i, j]`` is the sub-row of row `i` starting at column `j`.
+
+    >>> row_windows(np.arange(6).reshape(2, 3), 2).tolist()
+    [[[0, 1], [1, 2]], [[3, 4], [4, 5]]]
+    """
+    rows, cols = arr.shape
+    if sub_size > cols:
+        return np.empty((rows, 0, sub_size), dtype=arr.dtype)
+    return np.lib.stride_tricks.sliding_window_view(arr, sub_size, axis=1)
+
+
+def column_windows(arr, sub_size):
+    """
+    Return all sub-columns of length `sub_size` in the 2d numpy array `arr` as a read-only view without copying.
+
+    Returns:
+        A 3d array in which ``[j, i]`` is the sub-column of column `j` starting at row `i`.
+
+    >>> column_windows(np.arange(6).reshape(3, 2), 2).tolist()
+    [[[0, 2], [2, 4]], [[1, 3], [3, 5]]]
+    """
+    return row_windows(arr.T, sub_size)
+
+
+def major_diag_windows(arr, sub_size):
+    """
+    Return all top-left to bottom-right diagonals of length `sub_size` in the 2d numpy array `arr` as a read-only
+    view without copying.
+
+    Returns:
+        A 3d array in which ``[i, j]`` is the diagonal starting at ``arr[i, j]``.
+
+    >>> major_diag_windows(np.arange(9).reshape(3, 3), 2).tolist()
+    [[[0, 4], [1, 5]], [[3, 7], [4, 8]]]
+    """
+    rows, cols = arr.shape
+    if sub_size > min(rows, cols):
+        return np.empty((max(rows - sub_size + 1, 0), max(cols - sub_size + 1, 0), sub_size), dtype=arr.dtype)
+    squares = np.lib.stride_tricks.sliding_window_view(arr, (sub_size, sub_size))
+    return squares.diagonal(axis1=2, axis2=3)
+
+
+def minor_diag_windows(arr, sub_size):
+    """
+    Return all bottom-left to top-right diagonals of length `sub_size` in the 2d numpy array `arr` as a read-only
+    view without copying. These are the major diagonals of `arr` mirrored left to right, see `major_diag_windows`.
+
+    >>> minor_diag_windows(np.arange(9).reshape(3, 3), 2).tolist()
+    [[[2, 4], [1, 3]], [[5, 7], [4, 6]]]
+    """
+    return major_diag_windows(arr[:, ::-1], sub_size)
+
+
+def _yield_windows(windows):
+    for line in windows:
+        yield from line
+
+
 def sub_rows(arr, sub_size):
     """
-    Yield all sub-rows of length `sub_size` in the 2d numpy array `arr`.
+    Yield all sub-rows of length `sub_size` in the 2d numpy array `arr`, see `row_windows`.
 
     Args:
         arr: A 2d numpy array. ``arr[0, 0]`` is considered the top-left corner.
         sub_size: The length of the sub-rows to yield.
 
     Yields:
-        The sub-rows.
+        The sub-rows, as read-only views.
     """
-    rows, cols = arr.shape
-    for i in range(rows):
-        for j in range(cols - sub_size + 1):
-            yield arr[i, range(j, j + sub_size)]
+    return _yield_windows(row_windows(arr, sub_size))
 
 
 def sub_columns(arr, sub_size):
     """
-    Yield all sub-columns of length `sub_size` in the 2d numpy array `arr`.
+    Yield all sub-columns of length `sub_size` in the 2d numpy array `arr`, see `column_windows`.
 
     Args:
         arr: A 2d numpy array. ``arr[0, 0]`` is considered the top-left corner.
         sub_size: The length of the sub-columns to yield.
 
     Yields:
-        The sub-columns.
+        The sub-columns, as read-only views.
     """
-    return sub_rows(arr.T, sub_size)
+    return _yield_windows(column_windows(arr, sub_size))
 
 
 def sub_major_diags(arr, sub_size):
     """
-    Yield all top-left to bottom-right diagonals of length `sub_size` in the 2d numpy array `arr`.
+    Yield all top-left to bottom-right diagonals of length `sub_size` in the 2d numpy array `arr`,
+    see `major_diag_windows`.
 
     Args:
         arr: A 2d numpy array. ``arr[0, 0]`` is considered the top-left corner.
         sub_size: The length of the diagonals to yield.
 
     Yields:
-        The diagonals.
+        The diagonals, as read-only views.
     """
-    rows, cols = arr.shape
-    for i in range(rows - sub_size + 1):
-        for j in range(cols - sub_size + 1):
-            yield arr[range(i, i + sub_size), range(j, j + sub_size)]
+    return _yield_windows(major_diag_windows(arr, sub_size))
 
 
 def sub_minor_diags(arr, sub_size):
     """
-    Yield all bottom-left to top-right diagonals of length `sub_size` in the 2d numpy array `arr`.
+    Yield all bottom-left to top-right diagonals of length `sub_size` in the 2d numpy array `arr`,
+    see `minor_diag_windows`.
 
     Args:
         arr: A 2d numpy array. ``arr[0, 0]`` is considered the top-left corner.
         sub_size: The length of the diagonals to yield.
 
     Yields:
-        The diagonals.
+        The diagonals, as read-only views.
     """
-    return sub_major_diags(arr[:, ::-1], sub_size)
+    return _yield_windows(minor_diag_windows(arr, sub_size))
@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+import array as _array
+import bisect as _bisect
 import math as _math
 import decimal as _decimal
 import itertools as _itertools
@@ -7,10 +9,10 @@ import collections as _collections
 
 from math import factorial
 
-from basics.itertools import indexify_no_args
+from basics.itertools import Indexable, IndexableMixin, indexify_no_args
 
 try:
-    from math_name import gcd as _gcd
+    from math import gcd as _gcd
 except ImportError:
     from fractions import gcd as _gcd
 
@@ -63,27 +65,24 @@ def factors(num):
     """
     Return an ordered list of the prime factors of a number.
 
+    Numbers below `_SPF_LIMIT` are factored with a table of smallest prime factors, bigger numbers by division
+    with small primes and then Pollard's rho (see `_factor_large`).
+
     >>> factors(12)
     [2, 2, 3]
+    >>> factors(999983 * 1000003)
+    [999983, 1000003]
+    >>> factors(2 ** 61 - 1)
+    [2305843009213693951]
     """
     if num < 1:
         raise ValueError('num must be positive')
     elif num == 1:
         return [1]
-
-    factor_list = []
-    i = 2
-    iter_limit = isqrt(num)
-    while i <= iter_limit:
-        if num % i == 0:
-            while num % i == 0:
-                factor_list.append(i)
-                num = num // i
-            iter_limit = isqrt(num)
-        i += 1
-    if num != 1:
-        factor_list.append(num)
-    return factor_list
+    elif num < _SPF_LIMIT:
+        return _factor_small(num)
+    else:
+        return _factor_large(num)
 
 
 def gcd(nums):
@@ -116,30 +115,247 @@ def lcm(nums):
     return res
 
 
+# The prime table, grown on demand by `_extend_sieve`: ``_sieve[n]`` is 1 if n is prime and 0 otherwise, and
+# `_prime_list` holds the primes below ``len(_sieve)`` in order.
+_sieve = bytearray(b'\x00\x00\x01\x01')
+_prime_list = [2, 3]
+
+# Sieve in segments of this many numbers, so growing the table never needs much more than its own memory.
+_SEGMENT_SIZE = 1 << 20
+# `is_prime` grows the table up to this size, bigger numbers are checked with `_is_probable_prime`.
+_MAX_SIEVE_LOOKUP = 1 << 24
+
+
+def _extend_sieve(limit):
+    """
+    Grow the prime table to include all the numbers below `limit`, at least doubling its size.
+
+    >>> _extend_sieve(100)
+    >>> [n for n in range(100) if _sieve[n]] == [p for p in _prime_list if p < 100]
+    True
+    """
+    size = len(_sieve)
+    if limit <= size:
+        return
+    limit = max(limit, 2 * size)
+    # Crossing out the segments needs the primes up to the square root of the limit.
+    base_limit = isqrt(limit - 1) + 1
+    if base_limit > size:
+        _extend_sieve(base_limit)
+        size = len(_sieve)
+        if limit <= size:
+            return
+    for lo in range(size, limit, _SEGMENT_SIZE):
+        hi = min(lo + _SEGMENT_SIZE, limit)
+        segment = bytearray(b'\x01') * (hi - lo)
+        for p in _prime_list:
+            if p * p >= hi:
+                break
+            start = max(p * p, (lo + p - 1) // p * p) - lo
+            segment[start::p] = bytes(len(range(start, hi - lo, p)))
+        _sieve.extend(segment)
+        _prime_list.extend(_itertools.compress(range(lo, hi), segment))
+
+
 def is_prime(num):
     """
     Return whether num is prime.
 
+    Numbers too big for the prime table are checked with `_is_probable_prime`, which is exact below ``3.3e24``.
+
     >>> is_prime(17), is_prime(4)
     (True, False)
+    >>> is_prime(2 ** 31 - 1), is_prime(2 ** 32 + 1)
+    (True, False)
     """
     if num < 0:
         raise ValueError('num must be 0 or greater')
-    elif num < 2:
-        return False
-    else:
-        return not any((num % i == 0) for i in range(2, isqrt(num) + 1))
+    if len(_sieve) <= num < _MAX_SIEVE_LOOKUP:
+        _extend_sieve(num + 1)
+    if num < len(_sieve):
+        return bool(_sieve[num])
+    return _is_probable_prime(num)
 
 
-@indexify_no_args()
-def primes():
+class _Primes(IndexableMixin):
     """
-    Ordered list of primes.
+    Ordered list of primes, read from a prime table that grows as needed (see `_extend_sieve`).
+    Indexing, and slicing with non-negative bounds, are lookups in the table.
 
     >>> list(primes[:5])
     [2, 3, 5, 7, 11]
+    >>> primes[10 ** 5]
+    1299721
+    >>> list(primes[10:20:5])
+    [31, 53]
+    """
+    __slots__ = ()
+
+    def __iter__(self):
+        i = 0
+        while True:
+            self._extend_to(i + 1)
+            yield _prime_list[i]
+            i += 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.start, i.stop, i.step
+            if stop is None or stop < 0 or (start or 0) < 0 or (step or 1) < 0:
+                # Unbounded or counted from the end, like for any infinite `Indexable`.
+                return super(_Primes, self).__getitem__(i)
+            self._extend_to(stop)
+            return Indexable(_prime_list[start:stop:step])
+        idx = i.__index__()
+        if idx < 0:
+            return super(_Primes, self).__getitem__(idx)
+        self._extend_to(idx + 1)
+        return _prime_list[idx]
+
+    @staticmethod
+    def _extend_to(count):
+        """Grow the prime table until it holds at least `count` primes."""
+        while len(_prime_list) < count:
+            _extend_sieve(2 * len(_sieve))
+
+
+primes = _Primes()
+"""Ordered list of primes, see `_Primes`."""
+
+# The smallest prime factor table, grown on demand by `_extend_spf`: ``_spf[n]`` is the smallest prime factor
+# of n if n is composite, and 0 otherwise.
+_spf = _array.array('I')
+
+# The size up to which `factors` uses and grows the smallest prime factor table.
+_SPF_LIMIT = 1 << 22
+# Before Pollard's rho, big numbers are divided by the primes below this.
+_TRIAL_DIVISION_LIMIT = 1 << 10
+# With these bases the Miller-Rabin test is exact for every number below 3317044064679887385961981.
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def _extend_spf(limit):
+    """
+    Rebuild the smallest prime factor table to include all the numbers below `limit`, at least doubling its size.
+
+    >>> _extend_spf(100)
+    >>> _factor_small(60), _factor_small(97)
+    ([2, 2, 3, 5], [97])
+    """
+    global _spf
+    size = len(_spf)
+    if limit <= size:
+        return
+    limit = max(limit, min(2 * size, _SPF_LIMIT))
+    max_factor = isqrt(limit - 1)
+    _extend_sieve(max_factor + 1)
+    spf = _array.array('I', [0]) * limit
+    # Going from the biggest prime down, the smallest prime factor of every multiple is written last.
+    for p in reversed(_prime_list[:_bisect.bisect_right(_prime_list, max_factor)]):
+        spf[p * p::p] = _array.array('I', [p]) * len(range(p * p, limit, p))
+    _spf = spf
+
+
+def _factor_small(num):
+    """Return the ordered prime factors of ``1 < num < _SPF_LIMIT``, read from the smallest prime factor table."""
+    if num >= len(_spf):
+        _extend_spf(num + 1)
+    spf = _spf
+    factor_list = []
+    p = spf[num]
+    while p:
+        factor_list.append(p)
+        num //= p
+        p = spf[num]
+    factor_list.append(num)
+    return factor_list
+
+
+def _factor_large(num):
+    """Return the ordered prime factors of ``num > 1``, splitting off the big ones with `_pollard_rho`."""
+    _extend_sieve(_TRIAL_DIVISION_LIMIT)
+    factor_list = []
+    for p in _prime_list:
+        if p >= _TRIAL_DIVISION_LIMIT:
+            break
+        while num % p == 0:
+            factor_list.append(p)
+            num //= p
+    remaining = [num] if num > 1 else []
+    while remaining:
+        num = remaining.pop()
+        if num < _SPF_LIMIT:
+            factor_list.extend(_factor_small(num))
+        elif _is_probable_prime(num):
+            factor_list.append(num)
+        else:
+            divisor = _pollard_rho(num)
+            remaining += [divisor, num // divisor]
+    factor_list.sort()
+    return factor_list
+
+
+def _is_probable_prime(num):
     """
-    return filter(is_prime, _itertools.count(2))
+    Return whether num is prime according to the Miller-Rabin test, which is exact below ``3.3e24`` and wrong with
+    a negligible probability above.
+
+    >>> _is_probable_prime(2 ** 89 - 1), _is_probable_prime(2 ** 89 + 1)
+    (True, False)
+    """
+    if num < 2:
+        return False
+    for p in _MILLER_RABIN_BASES:
+        if num % p == 0:
+            return num == p
+    d, s = num - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, num)
+        if x == 1 or x == num - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % num
+            if x == num - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_rho(num):
+    """
+    Return a non-trivial divisor of the odd composite number `num`, using Brent's variant of Pollard's rho.
+
+    >>> _pollard_rho(999983 * 1000003) in (999983, 1000003)
+    True
+    """
+    for c in _itertools.count(1):
+        y, r, q, divisor = 2, 1, 1, 1
+        while divisor == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % num
+            k = 0
+            while k < r and divisor == 1:
+                ys = y
+                # Accumulate the differences, to take one gcd per batch.
+                for _ in range(min(128, r - k)):
+                    y = (y * y + c) % num
+                    q = q * abs(x - y) % num
+                divisor = _gcd(q, num)
+                k += 128
+            r *= 2
+        if divisor == num:
+            # The batch overshot, redo it one step at a time.
+            divisor = 1
+            while divisor == 1:
+                ys = (ys * ys + c) % num
+                divisor = _gcd(abs(x - ys), num)
+        if divisor != num:
+            return divisor
 
 
 def divisor_count(num):
@@ -161,18 +377,19 @@ def divisor_count(num):
 
 def divisors(num):
     """
-    Return all divisors of a number.
-
-    Unoptimized: O(num)
+    Return all divisors of a number, in order. They are generated from the prime factors of the number.
 
     >>> divisors(12)
     [1, 2, 3, 4, 6, 12]
+    >>> len(divisors(963761198400))
+    6720
     """
-    divisor_list = []
-    for i in range(1, num // 2 + 1):
-        if num % i == 0:
-            divisor_list.append(i)
-    divisor_list.append(num)
+    if num < 2:
+        return [num]
+    divisor_list = [1]
+    for p, exponent in _collections.Counter(factors(num)).items():
+        divisor_list = [d * p ** e for d in divisor_list for e in range(exponent + 1)]
+    divisor_list.sort()
     return divisor_list
 
 
@@ -110,14 +110,14 @@ class Stopwatch(object):
 
     def __init__(self, identifier=''):
         self.identifier = identifier
-        self.start_time = _time.clock()
+        self.start_time = _time.perf_counter()
 
     @property
     def elapsed_seconds(self):
-        return _time.clock() - self.start_time
+        return _time.perf_counter() - self.start_time
 
     def __enter__(self):
-        pass
+        return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         _logger.debug('%s exited in %s seconds.', self, self.elapsed_seconds)
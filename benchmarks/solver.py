@@ -0,0 +1,128 @@
+"""
+Benchmarks of the parser, the solver and the output writer on the bundled input files.
+
+Run from the project directory::
+
+    python -m benchmarks.solver --save-baseline      # Record the current numbers as the baseline.
+    python -m benchmarks.solver                      # Compare against the baseline.
+
+Every phase is timed `--repeat` times and the fastest run is kept. The peak memory of a whole run is measured
+in a separate, untimed run since tracing allocations slows everything down. The results are written as JSON,
+and the process exits with status 1 if any phase is slower (or uses more memory) than the baseline by more
+than `--threshold`.
+"""
+import argparse
+import glob
+import json
+import os.path
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from main import find_input, solve
+from basics import read
+from hashcode import PROJECT_DIR
+from hashcode.input_cache import load_input
+from hashcode.input_data import InputData
+from hashcode.output import write_commands
+
+BENCHMARKS_DIR = os.path.join(PROJECT_DIR, 'benchmarks')
+
+
+def _timed(f, *args):
+    start_time = time.perf_counter()
+    result = f(*args)
+    return time.perf_counter() - start_time, result
+
+
+def _write(drones):
+    with tempfile.TemporaryFile('w') as out_file:
+        write_commands(out_file, drones)
+
+
+def benchmark_file(path, repeat):
+    """Return a dict of the benchmark results of an input file."""
+    text = read(path)
+    parse_times, cached_load_times, solve_times, write_times = [], [], [], []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_input(path, cache_dir)
+        for _ in range(repeat):
+            cached_load_times.append(_timed(load_input, path, cache_dir)[0])
+    for _ in range(repeat):
+        parse_time, input_data = _timed(InputData._from_text, text)
+        solve_time, _ = _timed(solve, input_data)
+        write_time, _ = _timed(_write, input_data.drones)
+        parse_times.append(parse_time)
+        solve_times.append(solve_time)
+        write_times.append(write_time)
+
+    tracemalloc.start()
+    try:
+        input_data = InputData._from_text(text)
+        solve(input_data)
+        _write(input_data.drones)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(parse_seconds=min(parse_times),
+                cached_load_seconds=min(cached_load_times),
+                solve_seconds=min(solve_times),
+                write_seconds=min(write_times),
+                peak_memory_bytes=peak_memory)
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a list of descriptions of the measurements in `results` that regressed compared to `baseline`
+    by more than the fraction `threshold`.
+    """
+    regressions = []
+    for name, measurements in sorted(results.items()):
+        for key, value in sorted(measurements.items()):
+            base_value = baseline.get(name, {}).get(key)
+            if base_value and value > base_value * (1 + threshold):
+                regressions.append('{} {}: {:.4g} -> {:.4g} (+{:.0%})'.format(
+                    name, key, base_value, value, value / base_value - 1))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the parser, solver and output writer.')
+    parser.add_argument('inputs', nargs='*',
+                        help='Input files or names in input_files/. Defaults to every file in input_files/.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement. Defaults to 3.')
+    parser.add_argument('--output', default=os.path.join(BENCHMARKS_DIR, 'results.json'),
+                        help='Where to write the results. Defaults to benchmarks/results.json.')
+    parser.add_argument('--baseline', default=os.path.join(BENCHMARKS_DIR, 'baseline.json'),
+                        help='The baseline to compare against. Defaults to benchmarks/baseline.json.')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline file.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed regression as a fraction of the baseline. Defaults to 0.1.')
+    args = parser.parse_args(argv)
+
+    paths = args.inputs or sorted(glob.glob(os.path.join(PROJECT_DIR, 'input_files', '*.in')))
+    results = {}
+    for path in paths:
+        path = find_input(path)
+        name = os.path.basename(path)
+        results[name] = benchmark_file(path, args.repeat)
+        print('{:30} parse {parse_seconds:8.4f}s  cached {cached_load_seconds:8.4f}s  solve {solve_seconds:8.3f}s  write {write_seconds:8.4f}s  '
+              'peak {peak_memory_bytes:>12,} B'.format(name, **results[name]))
+
+    for out_path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        with open(out_path, 'w') as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.threshold)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
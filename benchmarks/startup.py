@@ -0,0 +1,52 @@
+"""
+Benchmarks of the time it takes a fresh interpreter to import the project's modules.
+
+Run from the project directory::
+
+    python -m benchmarks.startup
+
+Every statement is run `--repeat` times in a new interpreter and the fastest run is kept. The time of an
+interpreter that imports nothing is subtracted, so only the cost of the imports is reported.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+from hashcode import PROJECT_DIR
+
+STATEMENTS = [
+    'import basics',
+    'from basics import read',
+    'from basics import *',
+    'import hashcode.input_data',
+    'import main',
+]
+
+
+def startup_seconds(statement, repeat):
+    """Return the fastest of `repeat` runs of a new interpreter running `statement`."""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=PROJECT_DIR, check=True)
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the import time of the project\'s modules.')
+    parser.add_argument('statements', nargs='*', default=STATEMENTS,
+                        help='Statements to time. Defaults to importing basics, hashcode and main.')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per statement. Defaults to 10.')
+    args = parser.parse_args(argv)
+
+    baseline = startup_seconds('pass', args.repeat)
+    print('{:30} {:8.1f} ms'.format('(interpreter)', baseline * 1000))
+    for statement in args.statements:
+        print('{:30} {:8.1f} ms'.format(statement, (startup_seconds(statement, args.repeat) - baseline) * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
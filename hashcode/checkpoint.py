@@ -0,0 +1,146 @@
+"""
+Saving the state of a `main.solve` run, and restoring it to carry on from there.
+
+A resumed run gives the same commands as an uninterrupted one:
+
+>>> import os, shutil, tempfile
+>>> from hashcode.input_cache import load_input
+>>> from main import find_input, solve
+>>> def commands(input_data):
+...     return [c for d in input_data.drones for c in d.list_of_commands]
+>>> path = find_input('example')
+>>> uninterrupted = load_input(path, None)
+>>> _ = solve(uninterrupted)
+
+Interrupt a run right after it saved its state for the third time, with some of the trips planned:
+
+>>> class Interrupt(Exception):
+...     pass
+>>> saves = []
+>>> def save_and_interrupt(path, input_data, state):
+...     save_checkpoint(path, input_data, state)
+...     saves.append(path)
+...     if len(saves) == 3:
+...         raise Interrupt
+>>> checkpoint_path = os.path.join(tempfile.mkdtemp(), 'example.checkpoint.npz')
+>>> try:
+...     solve(load_input(path, None), checkpoint_path=checkpoint_path, checkpoint_interval=0,
+...           save=save_and_interrupt)
+... except Interrupt:
+...     pass
+>>> restored = load_input(path, None)
+>>> _ = load_checkpoint(checkpoint_path, restored)
+>>> 0 < len(commands(restored)) < len(commands(uninterrupted))
+True
+>>> resumed = load_input(path, None)
+>>> _ = solve(resumed, checkpoint_path=checkpoint_path, resume=True)
+>>> commands(resumed) == commands(uninterrupted)
+True
+>>> shutil.rmtree(os.path.dirname(checkpoint_path))
+"""
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from hashcode.input_data import InputData
+from hashcode.location import Location
+from hashcode.order_queue import OrderQueue
+from hashcode.restock import RestockTrip
+from hashcode.scheduler import DroneScheduler
+from hashcode.stock_index import StockIndex
+
+SolverState = namedtuple('SolverState', 'scheduler order_queue restock_trips arrivals')
+SolverState.__doc__ = """The state of `main.solve` besides the input data: the `DroneScheduler`, the `OrderQueue`,
+the list of `RestockTrip` still to fly and the list of ``(turn, warehouse_id, product_type, number_of_products)``
+of the items on their way."""
+
+# Commands are stored as rows of (drone_id, tag, a, b, c), waits as (drone_id, 'W', turns, 0, 0).
+_TAGS = ['L', 'U', 'D', 'W']
+_TAG_CODES = {tag: code for code, tag in enumerate(_TAGS)}
+
+
+def _commands_array(drones):
+    rows = [(c[0], _TAG_CODES[c[1]]) + tuple(c[2:]) + (0,) * (5 - len(c))
+            for d in drones for c in d.list_of_commands]
+    return np.array(rows, dtype=np.int64).reshape(-1, 5)
+
+
+def _restock_array(restock_trips):
+    rows = [(i, trip.source, trip.destination, product_type, number_of_products)
+            for i, trip in enumerate(restock_trips) for product_type, number_of_products in trip.loads]
+    return np.array(rows, dtype=np.int64).reshape(-1, 5)
+
+
+def _demand_array(input_data):
+    demand = np.zeros((input_data.orders_count, input_data.product_types), dtype=np.int64)
+    for order in input_data.orders_by_id:
+        for product_type, number_of_products in order.list_of_missing_products.items():
+            demand[order.id, product_type] = number_of_products
+    return demand
+
+
+def save_checkpoint(path, input_data: InputData, state: SolverState):
+    """
+    Write the state of a solver run to a compressed ``.npz`` file at `path`.
+
+    The file is written next to `path` first and then moved over it, so an interrupted write leaves
+    the previous checkpoint in place.
+    """
+    tmp_path = path + '.tmp.npz'
+    np.savez_compressed(
+        tmp_path,
+        drone_locs=np.array([d.loc for d in input_data.drones], dtype=np.int64).reshape(-1, 2),
+        drone_products=np.array([d.list_of_products for d in input_data.drones], dtype=np.int64),
+        commands=_commands_array(input_data.drones),
+        stock=np.array([w.list_of_products for w in input_data.warehouses], dtype=np.int64),
+        demand=_demand_array(input_data),
+        scheduler=state.scheduler.to_array(),
+        order_queue=state.order_queue.to_array(),
+        restock_trips=_restock_array(state.restock_trips),
+        arrivals=np.array(sorted(state.arrivals), dtype=np.int64).reshape(-1, 4))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, input_data: InputData):
+    """
+    Restore a solver run saved by `save_checkpoint` into freshly parsed input data of the same input file.
+
+    Returns:
+        The `SolverState` to carry on with.
+    """
+    with np.load(path) as checkpoint:
+        for drone, loc, products in zip(input_data.drones, checkpoint['drone_locs'].tolist(),
+                                        checkpoint['drone_products'].tolist()):
+            drone.loc = Location(*loc)
+            drone.list_of_products = products
+            drone.current_load = sum(n * w for n, w in zip(products, input_data.weights))
+            drone.list_of_commands = []
+        for row in checkpoint['commands'].tolist():
+            tag = _TAGS[row[1]]
+            command = (row[0], tag, row[2]) if tag == 'W' else (row[0], tag) + tuple(row[2:])
+            input_data.drones[row[0]].list_of_commands.append(command)
+
+        for w, stock in zip(input_data.warehouses, checkpoint['stock'].tolist()):
+            w.list_of_products = stock
+        input_data.stock_index = StockIndex(input_data.warehouses, input_data.product_types)
+
+        for order, demand in zip(input_data.orders_by_id, checkpoint['demand']):
+            product_types = np.flatnonzero(demand)
+            order.list_of_missing_products = dict(zip(product_types.tolist(), demand[product_types].tolist()))
+            order.remaining_items = int(demand.sum())
+            order.remaining_weight = order.total_weight(input_data.weights)
+            if order.remaining_items == 0:
+                input_data.order_grid.remove(order)
+
+        scheduler = DroneScheduler.from_array(input_data.deadline, checkpoint['scheduler'])
+        order_queue = OrderQueue.from_array(input_data.orders_by_id, checkpoint['order_queue'])
+        restock_trips = []
+        for i, source, destination, product_type, number_of_products in checkpoint['restock_trips'].tolist():
+            if i == len(restock_trips):
+                restock_trips.append(RestockTrip(source, destination, []))
+            restock_trips[i].loads.append((product_type, number_of_products))
+        arrivals = [tuple(arrival) for arrival in checkpoint['arrivals'].tolist()]
+
+    input_data.orders = list(order_queue)
+    return SolverState(scheduler, order_queue, restock_trips, arrivals)
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+SolverConfig = namedtuple('SolverConfig', 'order_selection warehouse_choice batch_orders batch_radius '
+                                          'restock_distance restock_drones restock_until improve_seconds')
+SolverConfig.__doc__ = """
+The tunables of `main.solve` and `main.solve_file`.
+
+* ``order_selection`` - ``'fewest_items'`` serves the orders with the fewest missing items first,
+  ``'quickest'`` the orders the free drone would complete soonest (see `hashcode.scoring.OrderScorer`).
+* ``warehouse_choice`` - ``'detour'`` loads at the stocked warehouse with the smallest detour on the way to
+  the order, ``'nearest'`` at the stocked warehouse closest to the drone.
+* ``batch_orders``, ``batch_radius`` - the maximal number of orders delivered to in one trip, and the maximal
+  distance between their destinations.
+* ``restock_distance`` - if not None, bring the items that orders would fetch from a warehouse at least this
+  much farther away than the one closest to them to that closest warehouse first
+  (see `hashcode.restock.plan_restocking`).
+* ``restock_drones`` - the number of drones flying the restocking trips, the others only deliver.
+* ``restock_until`` - the share of the deadline by which the restocking trips must be over. The trips that
+  don't fit are dropped and their items stay where they are.
+* ``improve_seconds`` - the time budget of a local search after solving, if positive
+  (see `hashcode.local_search.improve`).
+"""
+SolverConfig.__new__.__defaults__ = ('fewest_items', 'detour', 1, 20, None, 6, 0.1, 0)
+
+ORDER_SELECTIONS = ('fewest_items', 'quickest')
+WAREHOUSE_CHOICES = ('detour', 'nearest')
+
+
+def parse_field(field, text):
+    """
+    Parse the text of a `SolverConfig` field value, as given on the command line.
+
+    >>> parse_field('batch_orders', '3')
+    3
+    >>> parse_field('restock_distance', 'none') is None
+    True
+    >>> parse_field('batch_orders', '0')
+    Traceback (most recent call last):
+    ValueError: batch_orders must be at least 1, not 0
+    """
+    if field in ('order_selection', 'warehouse_choice'):
+        choices = ORDER_SELECTIONS if field == 'order_selection' else WAREHOUSE_CHOICES
+        if text not in choices:
+            raise ValueError('{} must be one of {}, not {!r}'.format(field, ', '.join(choices), text))
+        return text
+    if field == 'restock_distance' and text.lower() == 'none':
+        return None
+    if field == 'improve_seconds':
+        return float(text)
+    if field == 'restock_until':
+        share = float(text)
+        if not 0 <= share <= 1:
+            raise ValueError('restock_until must be between 0 and 1, not {}'.format(share))
+        return share
+    if field not in SolverConfig._fields:
+        raise ValueError('there is no solver setting {!r}'.format(field))
+    value = int(text)
+    # With no orders per trip nothing is ever delivered, and negative distances are never within reach.
+    minimum = 1 if field in ('batch_orders', 'restock_drones') else 0
+    if value < minimum:
+        raise ValueError('{} must be at least {}, not {}'.format(field, minimum, value))
+    return value
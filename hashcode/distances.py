@@ -0,0 +1,57 @@
+from typing import List
+
+import numpy as np
+
+from hashcode.location import Location, dist
+
+
+def dist_matrix(locs1: List[Location], locs2: List[Location]):
+    """Return the matrix of `dist` between every location in `locs1` and every location in `locs2`."""
+    locs1 = np.asarray(locs1, dtype=np.int64).reshape(-1, 2)
+    locs2 = np.asarray(locs2, dtype=np.int64).reshape(-1, 2)
+    d_row = locs1[:, 0, None] - locs2[None, :, 0]
+    d_col = locs1[:, 1, None] - locs2[None, :, 1]
+    return np.ceil(np.sqrt(d_row ** 2 + d_col ** 2)).astype(np.int32)
+
+
+class DistanceIndex(object):
+    """
+    Distances between warehouses and between warehouses and order destinations, computed once.
+
+    ``warehouse_to_warehouse[w1, w2]`` and ``warehouse_to_order[w, o]`` are indexed by warehouse and order ids.
+    Since drones only ever fly between warehouses and order destinations, these cover all of their moves.
+    """
+
+    def __init__(self, warehouse_locs: List[Location], order_locs: List[Location]):
+        self.warehouse_to_warehouse = dist_matrix(warehouse_locs, warehouse_locs)
+        self.warehouse_to_order = dist_matrix(warehouse_locs, order_locs)
+        # Several orders (or warehouses) can share a location, any of their ids will do.
+        self._warehouse_idx = {loc: i for i, loc in enumerate(warehouse_locs)}
+        self._order_idx = {loc: i for i, loc in enumerate(order_locs)}
+        self._warehouse_locs = np.asarray(warehouse_locs, dtype=np.int64).reshape(-1, 2)
+
+    def warehouses_from(self, loc: Location):
+        """Return an array of the distances from `loc` to every warehouse."""
+        w = self._warehouse_idx.get(loc)
+        if w is not None:
+            return self.warehouse_to_warehouse[w]
+        o = self._order_idx.get(loc)
+        if o is not None:
+            return self.warehouse_to_order[:, o]
+        return dist_matrix([loc], self._warehouse_locs)[0]
+
+    def dist(self, loc1: Location, loc2: Location):
+        """Same as `hashcode.location.dist`, looked up in the matrices when possible."""
+        w1 = self._warehouse_idx.get(loc1)
+        w2 = self._warehouse_idx.get(loc2)
+        if w1 is not None:
+            if w2 is not None:
+                return self.warehouse_to_warehouse.item(w1, w2)
+            o2 = self._order_idx.get(loc2)
+            if o2 is not None:
+                return self.warehouse_to_order.item(w1, o2)
+        elif w2 is not None:
+            o1 = self._order_idx.get(loc1)
+            if o1 is not None:
+                return self.warehouse_to_order.item(w2, o1)
+        return dist(loc1, loc2)
@@ -1,33 +1,36 @@
 from hashcode.location import Location
+from hashcode.output import format_command
 from math import ceil
 
 
 class Drone(object):
 
-    def __init__(self, id, number_of_product_types, initial_location, max_load):
+    def __init__(self, id, number_of_product_types, initial_location, max_load, distances=None):
         self.id = id
         self.list_of_products = [0] * number_of_product_types
         self.current_load = 0
         self.loc = initial_location
         self.max_load = max_load
+        # Commands are kept as tuples such as (drone_id, 'L', warehouse_id, product_type, number_of_products).
         self.list_of_commands = []
+        self.distances = distances
 
     def load(self, warehouse, product, number_of_products):
         dist = self.move(warehouse.loc[0], warehouse.loc[1])
         self.pack(product, number_of_products)
-        self.list_of_commands.append(' '.join([str(self.id), 'L', str(warehouse.get_id()), str(product.type_id), str(number_of_products)]) + '\n')
+        self.list_of_commands.append((self.id, 'L', warehouse.get_id(), product.type_id, number_of_products))
         return dist + 1
 
     def deliver(self, order, product, number_of_products):
         dist = self.move(order.destination[0], order.destination[1])
         self.unpack(product, number_of_products)
-        self.list_of_commands.append(' '.join([str(self.id), 'D', str(order.get_id()), str(product.type_id), str(number_of_products)]) + '\n')
+        self.list_of_commands.append((self.id, 'D', order.get_id(), product.type_id, number_of_products))
         return dist + 1
 
     def unload(self, warehouse, product, number_of_products):
         dist = self.move(warehouse.loc[0], warehouse.loc[1])
         self.unpack(product, number_of_products)
-        self.list_of_commands.append(' '.join([str(self.id), 'U', str(warehouse.get_id()), str(product.type_id), str(number_of_products)]) + '\n')
+        self.list_of_commands.append((self.id, 'U', warehouse.get_id(), product.type_id, number_of_products))
         return dist + 1
 
     def unpack(self, product, number_of_products):
@@ -42,12 +45,16 @@ class Drone(object):
         assert(self.current_load <= self.max_load)
 
     def move(self, dest_x, dest_y):
-        dist = int(ceil(((dest_x - self.loc[0]) ** 2 + (dest_y - self.loc[1]) ** 2) ** 0.5))
-        self.loc = Location(dest_x, dest_y)
+        dest = Location(dest_x, dest_y)
+        if self.distances is not None:
+            dist = self.distances.dist(self.loc, dest)
+        else:
+            dist = int(ceil(((dest_x - self.loc[0]) ** 2 + (dest_y - self.loc[1]) ** 2) ** 0.5))
+        self.loc = dest
         return dist
 
     def wait(self, number_of_turns):
-        self.list_of_commands.append(' '.join([str(self.id), 'W', str(number_of_turns)]) + '\n')
+        self.list_of_commands.append((self.id, 'W', number_of_turns))
 
     def dump_commands(self):
-        return self.list_of_commands
+        return [format_command(c) for c in self.list_of_commands]
@@ -0,0 +1,92 @@
+"""
+A cache of parsed input files in the binary form of `InputData.to_array`.
+
+The cached arrays are ``.npy`` files named after the input file, a key hashed from its full path, and a key hashed
+from its contents and modification time, so editing or touching an input file makes its next load parse it again,
+while inputs with the same name in different directories are cached apart. They are loaded
+memory mapped, but `InputData._from_array` still builds the usual Python objects from every section, so a
+cached load takes about half the time of a parse (14 ms against 22 ms on busy_day) rather than none.
+"""
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+from hashcode import PROJECT_DIR
+from hashcode.input_data import InputData
+from hashcode.profiling import profiler
+
+CACHE_DIR = os.path.join(PROJECT_DIR, '.cache', 'inputs')
+
+
+def _cache_prefix(path, cache_dir):
+    """Return the path of the cached forms of an input file, without the key of its contents."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    path_key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return os.path.join(cache_dir, '{}.{}'.format(name, path_key))
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    """Return the path of the cached form of the current contents of an input file."""
+    with open(path, 'rb') as in_file:
+        key = hashlib.sha1(in_file.read())
+    key.update(str(os.stat(path).st_mtime_ns).encode())
+    return '{}.{}.npy'.format(_cache_prefix(path, cache_dir), key.hexdigest()[:16])
+
+
+def load_input(path, cache_dir=CACHE_DIR, timer='parse'):
+    """
+    Return the `InputData` of an input file, from the cache if it's there, otherwise parsing the file and
+    caching it. Outdated cache entries of the same input file are removed. Pass ``cache_dir=None`` to
+    just parse the file. The load is timed by `hashcode.profiling.profiler` under the name `timer`.
+
+    Caching an input leaves the entries of other inputs alone, even if their names start the same:
+
+    >>> import shutil, tempfile
+    >>> from hashcode import PROJECT_DIR
+    >>> tmp_dir = tempfile.mkdtemp()
+    >>> cache_dir = os.path.join(tmp_dir, 'cache')
+    >>> for name in ('a.b.in', 'a.in'):
+    ...     _ = shutil.copy(os.path.join(PROJECT_DIR, 'input_files', 'example.in'), os.path.join(tmp_dir, name))
+    ...     _ = load_input(os.path.join(tmp_dir, name), cache_dir)
+    >>> sorted(name.split('.')[:-3] for name in os.listdir(cache_dir))
+    [['a'], ['a', 'b']]
+
+    Only the current entry of an edited input is kept:
+
+    >>> os.utime(os.path.join(tmp_dir, 'a.in'), ns=(0, 0))
+    >>> _ = load_input(os.path.join(tmp_dir, 'a.in'), cache_dir)
+    >>> len(os.listdir(cache_dir))
+    2
+    >>> shutil.rmtree(tmp_dir)
+    """
+    with profiler.timer(timer):
+        return _load_input(path, cache_dir)
+
+
+def _load_input(path, cache_dir):
+    if cache_dir is None:
+        with open(path) as in_file:
+            return InputData._from_text(in_file.read())
+
+    cached = cache_path(path, cache_dir)
+    if os.path.exists(cached):
+        return InputData._from_array(np.load(cached, mmap_mode='r'))
+
+    with open(path) as in_file:
+        input_data = InputData._from_text(in_file.read())
+    os.makedirs(cache_dir, exist_ok=True)
+    content_key = '[0-9a-f]' * 16
+    for outdated in glob.glob(glob.escape(_cache_prefix(path, cache_dir)) + '.' + content_key + '.npy'):
+        try:
+            os.remove(outdated)
+        except FileNotFoundError:
+            # Removed by a concurrent load of the same input.
+            pass
+    # Saved under a temporary name first so a concurrent load never sees a partial file.
+    tmp_path = '{}.{}.tmp'.format(cached, os.getpid())
+    with open(tmp_path, 'wb') as out_file:
+        np.save(out_file, input_data.to_array())
+    os.replace(tmp_path, cached)
+    return input_data
@@ -1,11 +1,39 @@
 from typing import List
 
+import numpy as np
+
 from hashcode.location import Location
+from hashcode.distances import DistanceIndex
+from hashcode.spatial import OrderGrid
+from hashcode.stock_index import StockIndex
 from hashcode.warehouse import Warehouse
 from hashcode.order import Order
 from hashcode.drone import Drone
 
-from basics.io_name import InputReader
+
+def _parse_header_and_warehouses(tokens):
+    """
+    Parse the part that input files and `InputData.to_array` have in common: the header, the weights and
+    the warehouses.
+
+    Returns:
+        A tuple of the 6 header values, the list of weights, the list of `Warehouse` and the position in `tokens`
+        of the number of orders.
+    """
+    header = tokens[:6].tolist()
+    product_types = header[5]
+    pos = 6
+    weights = tokens[pos:pos + product_types].tolist()
+    pos += product_types
+
+    warehouses_count = int(tokens[pos])
+    pos += 1
+    warehouses_block = tokens[pos:pos + warehouses_count * (2 + product_types)].reshape(warehouses_count, -1)
+    pos += warehouses_block.size
+    warehouses = []
+    for w, (row, col, *quantities) in enumerate(warehouses_block.tolist()):
+        warehouses.append(Warehouse(id=w, location=Location(row, col), list_of_products=quantities))
+    return header, weights, warehouses, pos
 
 
 class InputData(object):
@@ -14,39 +42,102 @@ class InputData(object):
         self.rows = rows
         self.cols = cols
         self.drones_count = drones_count
+        self.distances = DistanceIndex([w.loc for w in warehouses], [o.destination for o in orders])
         first_warehouse_loc = warehouses[0].loc
-        self.drones = [Drone(i, product_types, first_warehouse_loc, max_load) for i in range(drones_count)]
+        self.drones = [Drone(i, product_types, first_warehouse_loc, max_load, self.distances)
+                       for i in range(drones_count)]
         self.deadline = deadline
         self.max_load = max_load
         self.product_types = product_types  # video size
         self.weights = weights
         self.warehouses_count = warehouses_count
         self.warehouses = warehouses
+        self.stock_index = StockIndex(warehouses, product_types)
         self.orders_count = orders_count
         self.orders = orders
+        # The solver reorders and filters `orders`, this list stays indexed by order id.
+        self.orders_by_id = list(orders)
+        self.order_grid = OrderGrid(orders, rows, cols)
+        # An optional `hashcode.state.WorldState` the objects above are views over.
+        self.state = None
 
     @classmethod
     def _from_text(cls, text):
-        inp = InputReader(text)
-        rows, cols, drones, deadline, max_load = inp.ints(5)
-        product_types = inp.ints(1)[0]
-        weights = inp.ints(product_types)
-
-        warehouses_count = inp.ints(1)[0]
-        warehouses = []
-        for w in range(warehouses_count):
-            row, col = inp.ints(2)
-            quantities = inp.ints(product_types)
-            warehouses.append(Warehouse(id=w, location=Location(row, col), list_of_products=quantities))
-
-        orders_count = inp.ints(1)[0]
+        # Tokenizing the whole file in one call is much faster than parsing it line by line.
+        return cls._from_tokens(np.fromstring(text, dtype=np.int64, sep=' '))
+
+    @classmethod
+    def _from_tokens(cls, tokens):
+        """Build the input data from the flat array of all the integers in an input file."""
+        header, weights, warehouses, pos = _parse_header_and_warehouses(tokens)
+        rows, cols, drones, deadline, max_load, product_types = header
+        warehouses_count = len(warehouses)
+
+        orders_count = int(tokens[pos])
+        pos += 1
         orders = []
         for order in range(orders_count):
-            row, col = inp.ints(2)
-            items_cnt = inp.ints(1)[0]
-            items_quantities = inp.ints(items_cnt)
-            items = {i: items_quantities.count(i) for i in range(product_types) if items_quantities.count(i) != 0}
-            orders.append(Order(id=order, destination=Location(row, col), product_quantities=items))
+            row, col, items_cnt = tokens[pos:pos + 3].tolist()
+            pos += 3
+            counts = np.bincount(tokens[pos:pos + items_cnt], minlength=product_types)
+            pos += items_cnt
+            item_types = np.flatnonzero(counts)
+            items = dict(zip(item_types.tolist(), counts[item_types].tolist()))
+            orders.append(Order(id=order, destination=Location(row, col), product_quantities=items,
+                                product_weights=weights))
+        assert pos == len(tokens)
+
+        return cls(rows, cols, drones, deadline, max_load, product_types, weights,
+                   warehouses_count, warehouses, orders_count, orders)
+
+    def to_array(self):
+        """
+        Return the input data as a flat array that `_from_array` can build it back from much faster than
+        parsing the text, see `hashcode.input_cache`. Call it on freshly parsed input data.
+
+        The layout is the header, the weights, the warehouses as in the input file, then the number of orders,
+        the destinations of all the orders, their numbers of distinct product types, and finally the product
+        types and the counts of all their items.
+        """
+        orders = self.orders_by_id
+        items = [item for o in orders for item in o.list_of_missing_products.items()]
+        return np.concatenate([
+            [self.rows, self.cols, self.drones_count, self.deadline, self.max_load, self.product_types],
+            self.weights,
+            [self.warehouses_count],
+            np.ravel([[w.loc.row, w.loc.col] + list(w.list_of_products) for w in self.warehouses]),
+            [self.orders_count],
+            np.ravel([o.destination for o in orders]),
+            [len(o.list_of_missing_products) for o in orders],
+            [product_type for product_type, _ in items],
+            [number_of_products for _, number_of_products in items],
+        ]).astype(np.int64)
+
+    @classmethod
+    def _from_array(cls, array):
+        """Build the input data from an array returned by `to_array`, which can be memory mapped."""
+        header, weights, warehouses, pos = _parse_header_and_warehouses(array)
+        rows, cols, drones, deadline, max_load, product_types = header
+        warehouses_count = len(warehouses)
+
+        orders_count = int(array[pos])
+        pos += 1
+        destinations = array[pos:pos + 2 * orders_count].reshape(orders_count, 2).tolist()
+        pos += 2 * orders_count
+        kinds = array[pos:pos + orders_count]
+        pos += orders_count
+        total_kinds = int(kinds.sum())
+        item_types = array[pos:pos + total_kinds].tolist()
+        item_counts = array[pos + total_kinds:pos + 2 * total_kinds].tolist()
+        assert pos + 2 * total_kinds == len(array)
+
+        orders = []
+        end = 0
+        for order, ((row, col), n_kinds) in enumerate(zip(destinations, kinds.tolist())):
+            start, end = end, end + n_kinds
+            items = dict(zip(item_types[start:end], item_counts[start:end]))
+            orders.append(Order(id=order, destination=Location(row, col), product_quantities=items,
+                                product_weights=weights))
 
         return cls(rows, cols, drones, deadline, max_load, product_types, weights,
                    warehouses_count, warehouses, orders_count, orders)
@@ -0,0 +1,350 @@
+import random
+import time
+
+from hashcode.input_data import InputData
+from hashcode.simulate import order_score
+
+
+class Trip(object):
+    """
+    Loads at a single warehouse followed by deliveries.
+
+    ``loads`` is a list of ``(product_type, number_of_products)``, and ``stops`` is a list of
+    ``(order_id, [(product_type, number_of_products), ...])`` in the order they are visited.
+    ``order_turns`` maps every order delivered to the turn its last item in this trip is delivered at.
+    A trip tried out as a replacement of another trip has that trip as its ``origin``.
+    """
+    __slots__ = ('warehouse', 'loads', 'stops', 'order_turns', 'origin', '_profile')
+
+    def __init__(self, warehouse, loads, stops, origin=None):
+        self.warehouse = warehouse
+        self.loads = loads
+        self.stops = stops
+        self.order_turns = {}
+        self.origin = origin
+        self._profile = None
+
+    def profile(self, search):
+        """
+        Return the turns from arriving at the warehouse to the end of the trip, the end location, and a list of
+        ``(order_id, turns from arriving at the warehouse to its last delivery)``. Computed once.
+        """
+        if self._profile is None:
+            loc = search.warehouse_locs[self.warehouse]
+            t = len(self.loads)
+            offsets = []
+            for order_id, items in self.stops:
+                dest = search.order_locs[order_id]
+                t += search.dist(loc, dest) + len(items)
+                loc = dest
+                offsets.append((order_id, t - 1))
+            self._profile = t, loc, offsets
+        return self._profile
+
+    def commands(self, drone_id):
+        for product_type, number_of_products in self.loads:
+            yield drone_id, 'L', self.warehouse, product_type, number_of_products
+        for order_id, items in self.stops:
+            for product_type, number_of_products in items:
+                yield drone_id, 'D', order_id, product_type, number_of_products
+
+
+def _split_trips(commands):
+    """
+    Split a drone's commands into `Trip` objects.
+
+    Returns:
+        The list of trips, or None if the commands aren't all trips from a single warehouse that deliver
+        exactly what they load.
+    """
+    trips = []
+    i = 0
+    while i < len(commands):
+        if commands[i][1] != 'L':
+            return None
+        warehouse = commands[i][2]
+        loads = []
+        while i < len(commands) and commands[i][1] == 'L':
+            if commands[i][2] != warehouse:
+                return None
+            loads.append(commands[i][3:])
+            i += 1
+        stops = []
+        delivered = {}
+        while i < len(commands) and commands[i][1] == 'D':
+            order_id, product_type, number_of_products = commands[i][2:]
+            if not stops or stops[-1][0] != order_id:
+                stops.append((order_id, []))
+            stops[-1][1].append((product_type, number_of_products))
+            delivered[product_type] = delivered.get(product_type, 0) + number_of_products
+            i += 1
+        loaded = {}
+        for product_type, number_of_products in loads:
+            loaded[product_type] = loaded.get(product_type, 0) + number_of_products
+        if loaded != delivered:
+            return None
+        trips.append(Trip(warehouse, loads, stops))
+    return trips
+
+
+class LocalSearch(object):
+    """
+    Improves the drones' commands of a solved input by hill climbing.
+
+    The commands of every drone are split into trips, and random moves are tried:
+
+    * Swapping two trips of different drones, or moving a trip to another drone.
+    * Swapping two trips of the same drone.
+    * Swapping two delivery stops of a trip.
+    * Loading a trip at another warehouse that has the spare stock.
+
+    A move only retimes the trips of the drones it changes from the first changed trip on, and only the
+    orders delivered in those trips are rescored, so moves are cheap to evaluate. A move is kept if it raises
+    the score, or keeps the score and shortens the drones' schedules.
+
+    Drones whose commands aren't plain trips (e.g. waits or unloads), and drones loading at warehouses that
+    receive unloads, are left untouched since their feasibility depends on timing.
+    """
+
+    def __init__(self, input_data: InputData, seed=None):
+        self.input_data = input_data
+        self.random = random.Random(seed)
+        self.dist = input_data.distances.dist
+        self.warehouse_locs = [w.loc for w in input_data.warehouses]
+        self.order_locs = [o.destination for o in input_data.orders_by_id]
+        # The solved warehouses hold exactly the stock no trip loads.
+        self.spare_stock = [list(w.list_of_products) for w in input_data.warehouses]
+
+        commands = [d.list_of_commands for d in input_data.drones]
+        restocked = {c[2] for cmds in commands for c in cmds if c[1] == 'U'}
+        self.trips = []
+        self.movable = []
+        for d, cmds in enumerate(commands):
+            trips = _split_trips(cmds)
+            fixed = trips is None or any(t.warehouse in restocked for t in trips)
+            self.trips.append(None if fixed else trips)
+            if not fixed:
+                self.movable.append(d)
+        self.fixed_commands = {d: commands[d] for d in range(len(commands)) if self.trips[d] is None}
+        self.warehouse_choices = [w for w in range(input_data.warehouses_count) if w not in restocked]
+
+        # The delivery turns of the drones that can't be changed never change.
+        self.fixed_turns = {}
+        for cmds in self.fixed_commands.values():
+            for order_id, turn in self._command_delivery_turns(cmds):
+                self.fixed_turns[order_id] = max(self.fixed_turns.get(order_id, -1), turn)
+
+        self.order_trips = {}
+        self.end_times = {}
+        for d in self.movable:
+            for trip in self.trips[d]:
+                for order_id, _ in trip.stops:
+                    self.order_trips.setdefault(order_id, []).append(trip)
+            timing = self._retime(self.trips[d], 0, 0, self.warehouse_locs[0])
+            assert timing is not None
+            self._commit_timing(d, self.trips[d], 0, timing)
+        # Moves don't change what is delivered, so the same orders stay complete.
+        self.completion_turns = {o.id: self._completion_turn(o.id, {})
+                                 for o in input_data.orders_by_id if o.remaining_items == 0}
+        self.score = sum(order_score(t, input_data.deadline) for t in self.completion_turns.values())
+
+    def _command_delivery_turns(self, commands):
+        loc = self.warehouse_locs[0]
+        t = 0
+        for c in commands:
+            if c[1] == 'W':
+                t += c[2]
+                continue
+            dest = self.order_locs[c[2]] if c[1] == 'D' else self.warehouse_locs[c[2]]
+            t += self.dist(loc, dest) + 1
+            loc = dest
+            if c[1] == 'D':
+                yield c[2], t - 1
+
+    def _retime(self, trips, k, start_time, start_loc):
+        """
+        Return the end turn, end location and order turns of each of ``trips[k:]`` when trip k starts at the given
+        turn and location, or None if they don't end by the deadline.
+        """
+        t, loc = start_time, start_loc
+        timing = []
+        for trip in trips[k:]:
+            duration, end_loc, offsets = trip.profile(self)
+            t += self.dist(loc, self.warehouse_locs[trip.warehouse])
+            timing.append((t + duration, end_loc, {order_id: t + offset for order_id, offset in offsets}))
+            t += duration
+            loc = end_loc
+        if t > self.input_data.deadline:
+            return None
+        return timing
+
+    def _start(self, d, k):
+        if k == 0:
+            return 0, self.warehouse_locs[0]
+        end_time, end_loc = self.end_times[d][k - 1]
+        return end_time, end_loc
+
+    def _commit_timing(self, d, trips, k, timing):
+        end_times = self.end_times.setdefault(d, [])
+        del end_times[k:]
+        for trip, (end_time, end_loc, order_turns) in zip(trips[k:], timing):
+            trip.order_turns = order_turns
+            end_times.append((end_time, end_loc))
+
+    def _completion_turn(self, order_id, new_turns):
+        turn = self.fixed_turns.get(order_id, -1)
+        for trip in self.order_trips.get(order_id, ()):
+            trip_turn = new_turns.get(trip, trip.order_turns)[order_id]
+            if trip_turn > turn:
+                turn = trip_turn
+        return turn
+
+    def _evaluate(self, changes):
+        """
+        Evaluate a move.
+
+        Args:
+            changes: A dict of drone => (new trips, index of the first changed trip).
+
+        Returns:
+            The score delta, the end time delta, the new timings and the new completion turns of the orders,
+            or None if the move is infeasible.
+        """
+        deadline = self.input_data.deadline
+        new_turns = {}
+        timings = {}
+        affected = set()
+        time_delta = 0
+        for d, (trips, k) in changes.items():
+            start_time, start_loc = self._start(d, k)
+            timing = self._retime(trips, k, start_time, start_loc)
+            if timing is None:
+                return None
+            timings[d] = timing
+            for trip, (_, _, order_turns) in zip(trips[k:], timing):
+                new_turns[trip.origin or trip] = order_turns
+                affected.update(order_turns)
+            old_end = self.end_times[d][-1][0] if self.end_times[d] else 0
+            new_end = timing[-1][0] if timing else start_time
+            time_delta += new_end - old_end
+
+        score_delta = 0
+        completion_turns = {}
+        for order_id in affected:
+            if order_id in self.completion_turns:
+                old_turn = self.completion_turns[order_id]
+                new_turn = self._completion_turn(order_id, new_turns)
+                if new_turn != old_turn:
+                    completion_turns[order_id] = new_turn
+                    score_delta += order_score(new_turn, deadline) - order_score(old_turn, deadline)
+        return score_delta, time_delta, timings, completion_turns
+
+    def _apply(self, changes, timings, completion_turns):
+        for d, (trips, k) in changes.items():
+            self.trips[d][:] = trips
+            self._commit_timing(d, self.trips[d], k, timings[d])
+        self.completion_turns.update(completion_turns)
+
+    def _random_move(self):
+        """Return a random move as ``(changes, on_commit)``, or None."""
+        rnd = self.random
+        movable = [d for d in self.movable if self.trips[d]]
+        if not movable:
+            return None
+        kind = rnd.random()
+        a = rnd.choice(movable)
+        trips_a = self.trips[a]
+        i = rnd.randrange(len(trips_a))
+
+        if kind < 0.35 and len(self.movable) > 1:
+            b = rnd.choice(self.movable)
+            if b == a:
+                return None
+            trips_b = self.trips[b]
+            new_a = list(trips_a)
+            new_b = list(trips_b)
+            if trips_b and rnd.random() < 0.5:
+                j = rnd.randrange(len(trips_b))
+                new_a[i], new_b[j] = trips_b[j], trips_a[i]
+            else:
+                j = rnd.randrange(len(trips_b) + 1)
+                new_b.insert(j, new_a.pop(i))
+            return {a: (new_a, i), b: (new_b, j)}, None
+
+        if kind < 0.6:
+            j = rnd.randrange(len(trips_a))
+            if i == j:
+                return None
+            new_a = list(trips_a)
+            new_a[i], new_a[j] = new_a[j], new_a[i]
+            return {a: (new_a, min(i, j))}, None
+
+        trip = trips_a[i]
+        if kind < 0.8:
+            if len(trip.stops) < 2:
+                return None
+            s1, s2 = rnd.sample(range(len(trip.stops)), 2)
+            stops = list(trip.stops)
+            stops[s1], stops[s2] = stops[s2], stops[s1]
+            new_trip = Trip(trip.warehouse, trip.loads, stops, origin=trip)
+        else:
+            warehouse = rnd.choice(self.warehouse_choices)
+            if warehouse == trip.warehouse or any(self.spare_stock[warehouse][p] < n for p, n in trip.loads):
+                return None
+            new_trip = Trip(warehouse, trip.loads, trip.stops, origin=trip)
+
+        new_a = list(trips_a)
+        new_a[i] = new_trip
+
+        def on_commit():
+            # Keep the original object, it is referenced by order_trips.
+            for p, n in trip.loads:
+                self.spare_stock[trip.warehouse][p] += n
+                self.spare_stock[new_trip.warehouse][p] -= n
+            trip.warehouse, trip.stops, trip.order_turns = new_trip.warehouse, new_trip.stops, new_trip.order_turns
+            trip._profile = new_trip._profile
+            self.trips[a][i] = trip
+
+        return {a: (new_a, i)}, on_commit
+
+    def run(self, time_budget, max_moves=None):
+        """Try random moves until `time_budget` seconds pass, keeping the improving ones. Returns the new score."""
+        end_time = time.perf_counter() + time_budget
+        moves = 0
+        while time.perf_counter() < end_time and (max_moves is None or moves < max_moves):
+            moves += 1
+            move = self._random_move()
+            if move is None:
+                continue
+            changes, on_commit = move
+            evaluation = self._evaluate(changes)
+            if evaluation is None:
+                continue
+            score_delta, time_delta, timings, completion_turns = evaluation
+            if score_delta > 0 or (score_delta == 0 and time_delta < 0):
+                self._apply(changes, timings, completion_turns)
+                if on_commit is not None:
+                    on_commit()
+                self.score += score_delta
+        return self.score
+
+    def commands(self, drone_id):
+        """Return the (possibly improved) commands of a drone."""
+        if self.trips[drone_id] is None:
+            return list(self.fixed_commands[drone_id])
+        return [c for trip in self.trips[drone_id] for c in trip.commands(drone_id)]
+
+
+def improve(input_data: InputData, time_budget, seed=None):
+    """
+    Improve the commands of the drones of a solved input in place with a `LocalSearch`.
+
+    Returns:
+        The estimated score before and after.
+    """
+    search = LocalSearch(input_data, seed)
+    old_score = search.score
+    new_score = search.run(time_budget)
+    for drone in input_data.drones:
+        drone.list_of_commands = search.commands(drone.id)
+    return old_score, new_score
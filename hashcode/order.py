@@ -2,11 +2,16 @@ from hashcode.location import Location
 
 
 class Order(object):
-    def __init__(self, id, destination: Location, product_quantities):
-        """order_list is a list of (product, num_items) tuples"""
+    def __init__(self, id, destination: Location, product_quantities, product_weights=None):
+        """product_quantities is a dict of product type => number of items"""
         self.destination = destination
         self.list_of_missing_products = product_quantities
         self.id = id
+        # Kept up to date by `supply`. The weight is only tracked if the product weights are given.
+        self.remaining_items = sum(product_quantities.values())
+        self.remaining_weight = None if product_weights is None else self.total_weight(product_weights)
+        # Set by the `hashcode.spatial.OrderGrid` holding the order, which `supply` tells once it's complete.
+        self.order_grid = None
 
     def __str__(self):
         return 'order_id=' + str(self.id) + ' missing_list' + str(self.list_of_missing_products)
@@ -14,6 +19,11 @@ class Order(object):
     def supply(self, product, num_of_items):
         self.list_of_missing_products[product.type_id] -= num_of_items
         assert self.list_of_missing_products[product.type_id] >= 0
+        self.remaining_items -= num_of_items
+        if self.remaining_weight is not None:
+            self.remaining_weight -= num_of_items * product.weight
+        if self.order_grid is not None and self.remaining_items == 0:
+            self.order_grid.remove(self)
 
     def clean(self):
         keys = list(self.list_of_missing_products.keys())
@@ -0,0 +1,143 @@
+"""
+An indexed heap of the pending orders.
+
+The queue always agrees with stable re-sorting the pending orders after every change, here over rounds that
+supply a random number of every missing product type to a few orders, completing some of them:
+
+>>> import random
+>>> from hashcode.location import Location
+>>> from hashcode.product import Product
+>>> rng = random.Random(2)
+>>> orders = [Order(i, Location(0, 0), {p: rng.randrange(1, 6) for p in rng.sample(range(5), 3)})
+...           for i in range(200)]
+>>> queue = OrderQueue(orders)
+>>> expected = sorted(orders, key=lambda o: o.remaining_items)
+>>> for _ in range(60):
+...     supplied = rng.sample(list(queue), min(len(queue), 6))
+...     for order in supplied:
+...         for product_type, missing in list(order.list_of_missing_products.items()):
+...             order.supply(Product(product_type, 1), rng.randint(1, missing))
+...         order.clean()
+...     queue.update(supplied)
+...     expected = sorted((o for o in expected if o.remaining_items > 0), key=lambda o: o.remaining_items)
+...     assert [o.id for o in queue] == [o.id for o in expected]
+...     assert all(o in queue for o in expected) and len(queue) == len(expected)
+...     heap = queue._heap
+...     assert all(heap[(i - 1) // 2][:2] < heap[i][:2] for i in range(1, len(heap)))
+...     assert all(queue._positions[entry[2].id] == i for i, entry in enumerate(heap))
+>>> len(queue), sum(o.remaining_items == 0 for o in orders)
+(81, 119)
+"""
+import heapq
+import itertools
+from typing import List
+
+import numpy as np
+
+from hashcode.order import Order
+from hashcode.seq import seq_after
+
+
+class OrderQueue(object):
+    """
+    The pending orders, fewest missing items first, in a binary heap indexed by order id.
+
+    Orders with the same number of missing items are kept in the order in which they got to that number,
+    which is the order that stable sorting all the orders after every change would give.
+    After supplying orders, pass them to `update`; it takes ``O(log n)`` per order.
+    """
+
+    def __init__(self, orders: List[Order]):
+        self._seq = itertools.count()
+        # Heap entries are [remaining_items, seq, order], seq breaks ties.
+        self._heap = [[o.remaining_items, next(self._seq), o] for o in orders if o.remaining_items > 0]
+        self._heap.sort()
+        self._positions = {entry[2].id: i for i, entry in enumerate(self._heap)}
+
+    @classmethod
+    def from_array(cls, orders_by_id: List[Order], entries):
+        """Rebuild a queue from the array returned by `to_array`, given all the orders indexed by id."""
+        queue = cls([])
+        queue._heap = [[remaining, seq, orders_by_id[order_id]] for remaining, seq, order_id in entries.tolist()]
+        queue._positions = {entry[2].id: i for i, entry in enumerate(queue._heap)}
+        queue._seq = seq_after(queue._heap)
+        return queue
+
+    def to_array(self):
+        """Return the heap as an array of ``(remaining_items, seq, order_id)`` rows, see `from_array`."""
+        return np.array([[remaining, seq, order.id] for remaining, seq, order in self._heap],
+                        dtype=np.int64).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, order):
+        return order.id in self._positions
+
+    def __iter__(self):
+        """
+        Lazily yield the orders by priority. Takes ``O(k log k)`` for the first k orders.
+        The queue must not be updated while iterating.
+        """
+        heap = self._heap
+        if not heap:
+            return
+        frontier = [(heap[0][:2], 0)]
+        while frontier:
+            _, i = heapq.heappop(frontier)
+            yield heap[i][2]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child][:2], child))
+
+    def update(self, orders: List[Order]):
+        """Re-prioritize orders whose number of missing items changed, removing completed orders."""
+        orders = [o for o in orders if o.id in self._positions]
+        # Orders that got to the same number of missing items keep their previous relative order.
+        orders.sort(key=lambda o: self._heap[self._positions[o.id]][:2])
+        for order in orders:
+            i = self._positions[order.id]
+            if order.remaining_items > 0:
+                self._heap[i][:2] = [order.remaining_items, next(self._seq)]
+                self._sift_down(i)
+                self._sift_up(self._positions[order.id])
+            else:
+                self._remove(i)
+
+    def _remove(self, i):
+        heap = self._heap
+        del self._positions[heap[i][2].id]
+        last = heap.pop()
+        if i < len(heap):
+            heap[i] = last
+            self._positions[last[2].id] = i
+            self._sift_down(i)
+            self._sift_up(self._positions[last[2].id])
+
+    def _swap(self, i, j):
+        heap = self._heap
+        heap[i], heap[j] = heap[j], heap[i]
+        self._positions[heap[i][2].id] = i
+        self._positions[heap[j][2].id] = j
+
+    def _sift_up(self, i):
+        heap = self._heap
+        while i > 0:
+            parent = (i - 1) // 2
+            if heap[i][:2] >= heap[parent][:2]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        heap = self._heap
+        n = len(heap)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and heap[child][:2] < heap[smallest][:2]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
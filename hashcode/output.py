@@ -8,3 +8,32 @@ def write_output(out_stream, cache_id_to_videos_ids):
         out_stream.write(str(cache_id) + ' ')
         out_stream.write(' '.join(str(i) for i in sorted(videos_ids)))
         out_stream.write('\n')
+
+
+def format_command(command):
+    """
+    Format a command tuple as a line of the output file.
+
+    >>> format_command((0, 'L', 1, 2, 3))
+    '0 L 1 2 3\\n'
+    """
+    return ' '.join(map(str, command)) + '\n'
+
+
+def write_commands(out_stream, drones, chunk_size=4096):
+    """
+    Write the commands of all the drones to an output stream.
+
+    The number of commands is counted up front, and the commands are formatted and written in chunks of
+    `chunk_size` lines, so the whole output never needs to be built in memory.
+
+    Returns:
+        The number of commands written.
+    """
+    count = sum(len(d.list_of_commands) for d in drones)
+    out_stream.write('{}\n'.format(count))
+    for d in drones:
+        commands = d.list_of_commands
+        for i in range(0, len(commands), chunk_size):
+            out_stream.write(''.join(map(format_command, commands[i:i + chunk_size])))
+    return count
@@ -0,0 +1,126 @@
+"""
+Lightweight named timers and counters for the phases of a solver run.
+
+The solver reports to the module's `profiler`, which does nothing until it is enabled::
+
+    profiler.enable()
+    with profiler.timer('parse'):
+        ...
+    profiler.count('trips')
+    print(profiler.summary())
+"""
+from collections import Counter
+from time import perf_counter_ns
+
+
+class _Timer(object):
+    """Adds the nanoseconds spent in its ``with`` blocks to the totals of a `Profiler`. Not reentrant."""
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._profiler.add_time(self._name, perf_counter_ns() - self._start)
+
+
+class _NullTimer(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+_END = object()
+
+
+class Profiler(object):
+    """
+    Named timers, each totalling the time and the number of times it was entered, and named counters.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._timers = {}
+        self.times = Counter()
+        self.calls = Counter()
+        self.counters = Counter()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.times.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def timer(self, name):
+        """Return a context manager timing its block under `name`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _Timer(self, name)
+        return timer
+
+    def timed(self, name, iterable):
+        """Return an iterator over `iterable` that times how long it takes to produce the items under `name`."""
+        if not self.enabled:
+            return iterable
+        return self._timed(self.timer(name), iter(iterable))
+
+    @staticmethod
+    def _timed(timer, iterator):
+        while True:
+            with timer:
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def add_time(self, name, nanoseconds, calls=1):
+        self.times[name] += nanoseconds
+        self.calls[name] += calls
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def stats(self):
+        """Return the timers and counters as a picklable dict, see `merge`."""
+        return {'times': dict(self.times), 'calls': dict(self.calls), 'counters': dict(self.counters)}
+
+    def merge(self, stats):
+        """Add the `stats` of another profiler, e.g. of a worker process."""
+        self.times.update(stats['times'])
+        self.calls.update(stats['calls'])
+        self.counters.update(stats['counters'])
+
+    def summary(self):
+        """Return a table of the timers, slowest first, and of the counters."""
+        lines = ['{:24} {:>10} {:>12} {:>12}'.format('timer', 'calls', 'total ms', 'per call us')]
+        for name, nanoseconds in self.times.most_common():
+            calls = self.calls[name]
+            lines.append('{:24} {:>10} {:>12.1f} {:>12.1f}'.format(
+                name, calls, nanoseconds / 1e6, nanoseconds / 1e3 / max(calls, 1)))
+        if self.counters:
+            lines.append('{:24} {:>10}'.format('counter', 'count'))
+            for name, count in sorted(self.counters.items()):
+                lines.append('{:24} {:>10}'.format(name, count))
+        return '\n'.join(lines)
+
+
+profiler = Profiler()
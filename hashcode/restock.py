@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+import numpy as np
+
+from hashcode.input_data import InputData
+from hashcode.product import Product
+
+RestockTrip = namedtuple('RestockTrip', 'source destination loads')
+RestockTrip.__doc__ = """A trip loading ``loads``, a list of (product_type, number_of_products), at one warehouse
+and unloading them at another."""
+
+
+def far_demand(input_data: InputData, min_distance):
+    """
+    Find the items the orders would have to fetch from far away.
+
+    The missing items of the pending orders, fewest missing items first like `main.solve` serves them, are
+    matched to the stock of the warehouses nearest to their destinations. An item counts as far if the warehouse
+    it is matched to is at least `min_distance` farther from the destination than the warehouse closest to it.
+
+    Returns:
+        A dict of ``(source, destination)`` warehouse ids => dict of product type => number of items, where
+        `source` is the warehouse the items are matched to and `destination` the one closest to their order.
+    """
+    wo = input_data.distances.warehouse_to_order
+    available = np.array([w.list_of_products for w in input_data.warehouses], dtype=np.int64)
+    closest = np.argmin(wo, axis=0)
+    transfers = {}
+    for order in sorted(input_data.orders, key=lambda o: o.remaining_items):
+        nearest_first = np.argsort(wo[:, order.id], kind='stable')
+        dst = int(closest[order.id])
+        for product_type, need in order.list_of_missing_products.items():
+            for src in nearest_first:
+                if need == 0:
+                    break
+                amount = min(need, int(available[src, product_type]))
+                if amount == 0:
+                    continue
+                available[src, product_type] -= amount
+                need -= amount
+                if src != dst and wo[src, order.id] - wo[dst, order.id] >= min_distance:
+                    pair = transfers.setdefault((int(src), dst), {})
+                    pair[product_type] = pair.get(product_type, 0) + amount
+    return transfers
+
+
+def pack_trips(input_data: InputData, transfers):
+    """
+    Pack transfers, a dict as returned by `far_demand`, into as few trips as fit in a drone.
+
+    Returns:
+        A list of `RestockTrip`, fullest trips first.
+    """
+    trips = []
+    weights = input_data.weights
+    for (src, dst), products in sorted(transfers.items()):
+        # Next fit, heaviest product types first.
+        loads, load = [], 0
+        for product_type in sorted(products, key=lambda p: (-weights[p], p)):
+            remaining = products[product_type]
+            while remaining > 0:
+                quantity = min(remaining, (input_data.max_load - load) // weights[product_type])
+                if quantity == 0:
+                    trips.append(RestockTrip(src, dst, loads))
+                    loads, load = [], 0
+                    continue
+                loads.append((product_type, quantity))
+                load += quantity * weights[product_type]
+                remaining -= quantity
+        if loads:
+            trips.append(RestockTrip(src, dst, loads))
+    trips.sort(key=lambda trip: -sum(n * weights[p] for p, n in trip.loads))
+    return trips
+
+
+def plan_restocking(input_data: InputData, min_distance):
+    """
+    Plan bulk transfers of the items that orders would otherwise fetch from warehouses at least `min_distance`
+    farther away than the warehouse closest to them, to that closest warehouse. See `far_demand` and
+    `pack_trips`.
+
+    Returns:
+        A list of `RestockTrip`, fullest trips first.
+
+    Three warehouses on a line, with all the stock at the first one, a drone carrying 10 and products weighing
+    3 and 4. Order 2 is served at its closest warehouse, order 1 fetches an item 460 farther away than its
+    closest warehouse, and order 0 fetches 5 items 900 farther away, which take two trips:
+
+    >>> input_data = InputData._from_text('''100 1000 2 1000 10  2  3 4
+    ...     3  0 0  5 5  0 500  0 1  0 900  0 0
+    ...     3  0 950  5  0 0 0 0 1  0 480  2  1 1  0 10  1  0''')
+    >>> far_demand(input_data, 100)
+    {(0, 1): {1: 1}, (0, 2): {0: 4, 1: 1}}
+    >>> for trip in plan_restocking(input_data, 100):
+    ...     print(trip)
+    RestockTrip(source=0, destination=2, loads=[(1, 1), (0, 2)])
+    RestockTrip(source=0, destination=2, loads=[(0, 2)])
+    RestockTrip(source=0, destination=1, loads=[(1, 1)])
+    >>> plan_restocking(input_data, 500) == plan_restocking(input_data, 100)[:2]
+    True
+    """
+    return pack_trips(input_data, far_demand(input_data, min_distance))
+
+
+def reserve(input_data: InputData, trips):
+    """Take the items of the restocking trips out of their source warehouses' stock."""
+    for trip in trips:
+        for product_type, number_of_products in trip.loads:
+            input_data.warehouses[trip.source].give_items(product_type, number_of_products)
+
+
+def release(input_data: InputData, trips):
+    """Put the items of restocking trips that won't be flown back into their source warehouses' stock."""
+    for trip in trips:
+        for product_type, number_of_products in trip.loads:
+            input_data.warehouses[trip.source].get_items(product_type, number_of_products)
+
+
+def run_restock_trip(input_data: InputData, drone, trip: RestockTrip):
+    """
+    Fly the drone on a restocking trip. The items must already be taken out of the source warehouse's stock,
+    see `reserve`; they are only added to the destination's stock when they arrive.
+
+    Returns:
+        The number of turns the trip takes, and a list of ``(turns, product_type, number_of_products)`` of
+        the unloads, `turns` being how many turns after the start of the trip the items arrive.
+    """
+    source = input_data.warehouses[trip.source]
+    destination = input_data.warehouses[trip.destination]
+    turns = 0
+    for product_type, number_of_products in trip.loads:
+        turns += drone.load(source, Product(product_type, input_data.weights[product_type]), number_of_products)
+    arrivals = []
+    for product_type, number_of_products in trip.loads:
+        turns += drone.unload(destination, Product(product_type, input_data.weights[product_type]),
+                              number_of_products)
+        arrivals.append((turns, product_type, number_of_products))
+    return turns, arrivals
@@ -0,0 +1,45 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from hashcode.seq import seq_after
+
+
+class DroneScheduler(object):
+    """
+    A priority queue of drone-free-at events.
+
+    Drones are popped in the order of the turn they become free at. Drones that become free at the same
+    turn are popped in the order they were pushed. Events at or after the deadline are dropped.
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self._events = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._events)
+
+    def push(self, turn, drone_id):
+        if turn < self.deadline:
+            heapq.heappush(self._events, (turn, next(self._seq), drone_id))
+
+    def pop(self):
+        """Return the ``(turn, drone_id)`` of the next drone to become free."""
+        turn, _, drone_id = heapq.heappop(self._events)
+        return turn, drone_id
+
+    def to_array(self):
+        """Return the pending events as an array of ``(turn, seq, drone_id)`` rows, see `from_array`."""
+        return np.array(self._events, dtype=np.int64).reshape(-1, 3)
+
+    @classmethod
+    def from_array(cls, deadline, events):
+        """Rebuild a scheduler from the array returned by `to_array`."""
+        scheduler = cls(deadline)
+        scheduler._events = [tuple(event) for event in events.tolist()]
+        heapq.heapify(scheduler._events)
+        scheduler._seq = seq_after(scheduler._events)
+        return scheduler
@@ -0,0 +1,79 @@
+import numpy as np
+
+from hashcode.state import WorldState
+
+
+class OrderScorer(object):
+    """
+    Estimates for all the pending orders at once how many turns a drone would take to complete each of them,
+    with array operations over a `WorldState`.
+
+    The estimate of an order is the flight from the drone through the closest warehouse stocking any of its
+    missing products to its destination, plus a round trip from that warehouse for every further drone load
+    the order's missing weight takes, plus a load and a delivery turn per product type and trip.
+    After supplying orders, pass them to `update`.
+    """
+
+    def __init__(self, input_data):
+        self.input_data = input_data
+        self.state = input_data.state if input_data.state is not None else WorldState.attach(input_data)
+        orders = input_data.orders_by_id
+        self._weights = np.array([o.remaining_weight for o in orders], dtype=np.float64)
+        self._product_kinds = np.array([len(o.list_of_missing_products) for o in orders], dtype=np.float64)
+        self._pending = np.array([o.remaining_items > 0 for o in orders], dtype=bool)
+        # _holders[w, o] is the number of product types missing from order o that warehouse w has in stock.
+        self._missing = (self.state.demand > 0).astype(np.int32)
+        self._stocked = (self.state.stock > 0).astype(np.int32)
+        self._holders = self._stocked @ self._missing.T
+        self._stock_version = input_data.stock_index.version
+
+    def update(self, orders):
+        """Refresh the orders whose missing items changed."""
+        self._sync_stock()
+        for order in orders:
+            self._weights[order.id] = order.remaining_weight
+            self._product_kinds[order.id] = len(order.list_of_missing_products)
+            self._pending[order.id] = order.remaining_items > 0
+            self._missing[order.id] = self.state.demand[order.id] > 0
+            self._holders[:, order.id] = self._stocked @ self._missing[order.id]
+
+    def _sync_stock(self):
+        """Update the holder counts of the product types that got sold out or restocked somewhere."""
+        if self._stock_version == self.input_data.stock_index.version:
+            return
+        stocked = (self.state.stock > 0).astype(np.int32)
+        for w, product_type in zip(*np.nonzero(stocked != self._stocked)):
+            self._holders[w] += (stocked[w, product_type] - self._stocked[w, product_type]) \
+                * self._missing[:, product_type]
+        self._stocked = stocked
+        self._stock_version = self.input_data.stock_index.version
+
+    def estimated_turns(self, loc):
+        """
+        Return an array of the estimated turns to complete every order by a drone at `loc`,
+        infinite for completed orders and orders nothing is in stock for.
+        """
+        distances = self.input_data.distances
+        warehouse_to_order = distances.warehouse_to_order
+        self._sync_stock()
+        holders = self._holders > 0
+        first_trip = np.where(holders, distances.warehouses_from(loc)[:, None] + warehouse_to_order, np.inf)
+        round_trip = np.where(holders, 2 * warehouse_to_order, np.inf)
+        trips = np.maximum(np.ceil(self._weights / self.input_data.max_load), 1)
+        turns = first_trip.min(axis=0) + 2 * trips * self._product_kinds
+        more = trips > 1
+        turns[more] += (trips[more] - 1) * round_trip.min(axis=0)[more]
+        turns[~self._pending] = np.inf
+        return turns
+
+    def ranked(self, loc):
+        """Yield the orders that can be worked on, quickest to complete first and by id on ties."""
+        turns = self.estimated_turns(loc)
+        # Usually the first order will do, so only sort the rest if it doesn't.
+        best = int(np.argmin(turns))
+        if not np.isfinite(turns[best]):
+            return
+        yield self.input_data.orders_by_id[best]
+        order_ids = np.argsort(turns, kind='stable')
+        for order_id in order_ids[1:np.count_nonzero(np.isfinite(turns))].tolist():
+            yield self.input_data.orders_by_id[order_id]
@@ -0,0 +1,14 @@
+import itertools
+
+
+def seq_after(entries):
+    """
+    Return a counter of tie-breaking sequence numbers carrying on from heap entries whose second item is
+    the sequence number they were pushed with.
+
+    Only the order of the seqs matters, so carrying on after the largest one keeps the same order.
+
+    >>> next(seq_after([(5, 3, 'a'), (2, 7, 'b')])), next(seq_after([]))
+    (8, 0)
+    """
+    return itertools.count(max((e[1] for e in entries), default=-1) + 1)
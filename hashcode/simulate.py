@@ -0,0 +1,243 @@
+"""
+Replaying output files to score them and to find infeasible commands.
+
+On example.in, where drones start at warehouse 0 and the deadline is turn 50:
+
+>>> import os
+>>> from hashcode import PROJECT_DIR
+>>> def run(*commands, count=None):
+...     input_data = load_input(os.path.join(PROJECT_DIR, 'input_files', 'example.in'), None)
+...     return simulate(input_data, [str(len(commands) if count is None else count)] + list(commands))
+
+Order 1 is completed at turn 6, scoring ``ceil(100 * (50 - 6) / 50)``:
+
+>>> run('0 L 0 0 1', '0 D 1 0 1')
+SimulationResult(score=88, completed_orders=1, last_turn=6, violation=None)
+>>> order_score(6, 50), order_score(3, 7), order_score(49, 50)
+(88, 58, 2)
+
+Infeasible outputs are rejected at their first bad command:
+
+>>> run('0 L 1 2 2').violation
+'line 2: turn 8: drone 0 carries 900 > 500'
+>>> run('0 L 0 0 6').violation
+'line 2: turn 0: warehouse 0 has only 5 items of product 0'
+>>> run('0 L 0 0 2', '0 D 1 0 2').violation
+'line 3: turn 6: order 1 needs only 1 items of product 0'
+>>> run('0 L 0 0 1', '0 D 1 0 1', count=3).violation
+'declared 3 commands but found 2'
+
+Commands must be over by the last turn before the deadline:
+
+>>> run('0 W 50')
+SimulationResult(score=0, completed_orders=0, last_turn=49, violation=None)
+>>> run('0 W 51').violation
+'line 2: drone 0 is still busy at the deadline'
+"""
+import heapq
+from collections import namedtuple
+
+from hashcode.input_cache import load_input
+from hashcode.input_data import InputData
+
+
+SimulationResult = namedtuple('SimulationResult', 'score completed_orders last_turn violation')
+SimulationResult.__doc__ = """
+The outcome of replaying a command file.
+
+``violation`` describes the first infeasible command, or is None if all the commands are feasible.
+``score`` and ``completed_orders`` only count the orders completed before the violation.
+"""
+
+# Deliveries and unloads happen before loads on the same turn, so unloaded items can be loaded right away.
+_ACTION_PRIORITY = {'D': 0, 'U': 0, 'L': 1, 'W': 2}
+
+
+class _Violation(Exception):
+    pass
+
+
+def parse_command(line):
+    """
+    Parse a line of a command file into a tuple.
+
+    >>> parse_command('0 L 1 2 3')
+    (0, 'L', 1, 2, 3)
+    >>> parse_command('0 W 5')
+    (0, 'W', 5)
+    """
+    parts = line.split()
+    return (int(parts[0]), parts[1]) + tuple(int(p) for p in parts[2:])
+
+
+def order_score(completion_turn, deadline):
+    """Return the score of an order completed at the given turn."""
+    return -(-100 * (deadline - completion_turn) // deadline)
+
+
+class Simulator(object):
+    """
+    Replays commands against freshly parsed input data.
+
+    The commands of every drone are executed in order, and the drones are simulated together in time order,
+    so stock taken by one drone is missing for the others. Takes time linear in the number of commands.
+    """
+
+    def __init__(self, input_data: InputData):
+        self.input_data = input_data
+        self.stock = [list(w.list_of_products) for w in input_data.warehouses]
+        self.missing = [None] * input_data.orders_count
+        self.remaining = [0] * input_data.orders_count
+        self.order_locs = [None] * input_data.orders_count
+        for order in input_data.orders:
+            self.missing[order.id] = dict(order.list_of_missing_products)
+            self.remaining[order.id] = sum(order.list_of_missing_products.values())
+            self.order_locs[order.id] = order.destination
+        drones_count = input_data.drones_count
+        self.drone_commands = [[] for _ in range(drones_count)]
+        self.drone_locs = [input_data.warehouses[0].loc] * drones_count
+        self.drone_free_at = [0] * drones_count
+        self.drone_next = [0] * drones_count
+        self.drone_loads = [0] * drones_count
+        self.drone_products = [{} for _ in range(drones_count)]
+        self.score = 0
+        self.completed_orders = 0
+        self.last_turn = 0
+        self._events = []
+
+    def add_command(self, command, line_no=None):
+        """Queue a command tuple (see `parse_command`) at the end of its drone's commands."""
+        if not 0 <= command[0] < self.input_data.drones_count or command[1] not in _ACTION_PRIORITY \
+                or len(command) != (3 if command[1] == 'W' else 5):
+            raise _Violation('line {}: invalid command {}'.format(line_no, command))
+        self.drone_commands[command[0]].append((line_no, command))
+
+    def run(self):
+        """Execute all the queued commands and return a `SimulationResult`."""
+        try:
+            for d in range(self.input_data.drones_count):
+                self._schedule_next(d)
+            while self._events:
+                turn, _, d = heapq.heappop(self._events)
+                line_no, command = self.drone_commands[d][self.drone_next[d]]
+                self.drone_next[d] += 1
+                self.drone_free_at[d] = turn + 1
+                self.last_turn = turn
+                if command[1] != 'W':
+                    self._execute(turn, line_no, *command)
+                self._schedule_next(d)
+        except _Violation as e:
+            return self._result(str(e))
+        return self._result(None)
+
+    def _result(self, violation):
+        return SimulationResult(self.score, self.completed_orders, self.last_turn, violation)
+
+    def _schedule_next(self, d):
+        if self.drone_next[d] == len(self.drone_commands[d]):
+            return
+        line_no, command = self.drone_commands[d][self.drone_next[d]]
+        tag, target = command[1:3]
+        if tag == 'W':
+            if target <= 0:
+                raise _Violation('line {}: drone {} waits for {} turns'.format(line_no, d, target))
+            action_turn = self.drone_free_at[d] + target - 1
+        else:
+            if tag == 'D':
+                if not 0 <= target < self.input_data.orders_count:
+                    raise _Violation('line {}: there is no order {}'.format(line_no, target))
+                dest = self.order_locs[target]
+            else:
+                if not 0 <= target < self.input_data.warehouses_count:
+                    raise _Violation('line {}: there is no warehouse {}'.format(line_no, target))
+                dest = self.input_data.warehouses[target].loc
+            action_turn = self.drone_free_at[d] + self.input_data.distances.dist(self.drone_locs[d], dest)
+        if action_turn >= self.input_data.deadline:
+            raise _Violation('line {}: drone {} is still busy at the deadline'.format(line_no, d))
+        heapq.heappush(self._events, (action_turn, _ACTION_PRIORITY[tag], d))
+
+    def _execute(self, turn, line_no, d, tag, target, product_type, number_of_products):
+        input_data = self.input_data
+        if not 0 <= product_type < input_data.product_types or number_of_products <= 0:
+            raise _Violation('line {}: invalid product {} or number of items {}'.format(
+                line_no, product_type, number_of_products))
+        prefix = 'line {}: turn {}: '.format(line_no, turn)
+        products = self.drone_products[d]
+        weight = number_of_products * input_data.weights[product_type]
+        if tag == 'L':
+            self.drone_locs[d] = input_data.warehouses[target].loc
+            if self.stock[target][product_type] < number_of_products:
+                raise _Violation(prefix + 'warehouse {} has only {} items of product {}'.format(
+                    target, self.stock[target][product_type], product_type))
+            self.stock[target][product_type] -= number_of_products
+            products[product_type] = products.get(product_type, 0) + number_of_products
+            self.drone_loads[d] += weight
+            if self.drone_loads[d] > input_data.max_load:
+                raise _Violation(prefix + 'drone {} carries {} > {}'.format(
+                    d, self.drone_loads[d], input_data.max_load))
+            return
+
+        if products.get(product_type, 0) < number_of_products:
+            raise _Violation(prefix + 'drone {} carries only {} items of product {}'.format(
+                d, products.get(product_type, 0), product_type))
+        products[product_type] -= number_of_products
+        self.drone_loads[d] -= weight
+        if tag == 'U':
+            self.drone_locs[d] = input_data.warehouses[target].loc
+            self.stock[target][product_type] += number_of_products
+            return
+
+        self.drone_locs[d] = self.order_locs[target]
+        missing = self.missing[target]
+        if missing.get(product_type, 0) < number_of_products:
+            raise _Violation(prefix + 'order {} needs only {} items of product {}'.format(
+                target, missing.get(product_type, 0), product_type))
+        missing[product_type] -= number_of_products
+        self.remaining[target] -= number_of_products
+        if self.remaining[target] == 0:
+            self.score += order_score(turn, input_data.deadline)
+            self.completed_orders += 1
+
+
+def simulate(input_data: InputData, lines):
+    """
+    Replay the lines of an output file against freshly parsed input data. See `Simulator`.
+
+    Args:
+        input_data: The input the commands solve. It isn't modified, but must not have been solved already.
+        lines: The lines of the output file, e.g. an open file.
+
+    Returns:
+        A `SimulationResult`.
+    """
+    simulator = Simulator(input_data)
+    lines = iter(lines)
+    try:
+        declared_count = int(next(lines))
+    except (StopIteration, ValueError):
+        return simulator._result('line 1: expected the number of commands')
+    count = 0
+    try:
+        for line_no, line in enumerate(lines, 2):
+            if not line.strip():
+                continue
+            try:
+                command = parse_command(line)
+            except (IndexError, ValueError):
+                raise _Violation('line {}: malformed command {!r}'.format(line_no, line))
+            simulator.add_command(command, line_no)
+            count += 1
+    except _Violation as e:
+        return simulator._result(str(e))
+    if count != declared_count:
+        return simulator._result('declared {} commands but found {}'.format(declared_count, count))
+    return simulator.run()
+
+
+def simulate_file(input_path, output_path, cache_dir=None):
+    """Replay an output file against its input file. See `simulate`, and `hashcode.input_cache.load_input`
+    for `cache_dir`."""
+    # Timed apart from the solver's own load, which is what the 'parse' timer reports.
+    input_data = load_input(input_path, cache_dir, timer='load simulator input')
+    with open(output_path) as out_file:
+        return simulate(input_data, out_file)
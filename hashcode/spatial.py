@@ -0,0 +1,125 @@
+"""
+A grid index over the destinations of pending orders.
+
+The queries agree with a brute-force scan of the pending orders, including the order of ties:
+
+>>> import random
+>>> from hashcode.product import Product
+>>> rng = random.Random(0)
+>>> orders = [Order(i, Location(rng.randrange(60), rng.randrange(80)), {0: 1}) for i in range(300)]
+>>> grid = OrderGrid(orders, 60, 80, cell_size=7)
+>>> def brute_force(loc):
+...     return sorted((dist(loc, o.destination), o.id) for o in orders if o.remaining_items > 0)
+>>> def ids(found):
+...     return [(d, o.id) for d, o in found]
+>>> def check(queries):
+...     for loc, k, radius in queries:
+...         expected = brute_force(loc)
+...         assert ids(grid.nearest(loc, k)) == expected[:k], (loc, k)
+...         assert ids(grid.within(loc, radius)) == [e for e in expected if e[0] <= radius], (loc, radius)
+...     return len(grid)
+>>> queries = [(Location(rng.randrange(60), rng.randrange(80)), rng.randrange(1, 40), rng.randrange(30))
+...            for _ in range(200)]
+>>> check(queries + [(Location(0, 0), 300, 100), (Location(59, 79), 1000, 0)])
+300
+
+Orders at the same distance are returned by id:
+
+>>> ids(grid.nearest(Location(10, 10), 5))
+[(4, 106), (5, 219), (6, 96), (6, 171), (6, 231)]
+
+Completed orders remove themselves:
+
+>>> for order in orders[::3]:
+...     order.supply(Product(0, 1), 1)
+>>> check(queries)
+200
+>>> grid.remove(orders[1]); len(grid)
+199
+"""
+from math import ceil, sqrt
+from typing import List
+
+from hashcode.location import Location, dist
+from hashcode.order import Order
+
+
+class OrderGrid(object):
+    """
+    The pending orders bucketed by destination into square cells, for nearest-k and radius queries.
+
+    The cell size is picked from the map size so that a cell holds a few destinations on average.
+    The indexed orders remove themselves once they are complete (see `Order.supply`),
+    so the grid only ever holds pending orders.
+    """
+
+    ORDERS_PER_CELL = 4
+
+    def __init__(self, orders: List[Order], rows, cols, cell_size=None):
+        if cell_size is None:
+            cell_size = ceil(sqrt(rows * cols * self.ORDERS_PER_CELL / max(len(orders), 1)))
+        self.cell_size = max(int(cell_size), 1)
+        self._n_rows = rows // self.cell_size + 1
+        self._n_cols = cols // self.cell_size + 1
+        # Every cell maps order ids to orders, so removing an order takes O(1).
+        self._cells = {}
+        for order in orders:
+            if order.remaining_items > 0:
+                self._cells.setdefault(self._cell(order.destination), {})[order.id] = order
+                order.order_grid = self
+        self._size = sum(len(cell) for cell in self._cells.values())
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, loc: Location):
+        return loc.row // self.cell_size, loc.col // self.cell_size
+
+    def remove(self, order: Order):
+        """Remove the order if it is in the grid."""
+        cell = self._cells.get(self._cell(order.destination))
+        if cell is not None and cell.pop(order.id, None) is not None:
+            self._size -= 1
+        order.order_grid = None
+
+    def _ring(self, center, r):
+        """Yield the non-empty cells at Chebyshev distance `r` from the cell `center`."""
+        row, col = center
+        for i in range(row - r, row + r + 1):
+            step = 1 if i in (row - r, row + r) else 2 * r
+            for j in range(col - r, col + r + 1, max(step, 1)):
+                cell = self._cells.get((i, j))
+                if cell:
+                    yield cell
+
+    def within(self, loc: Location, radius):
+        """Return the list of ``(distance, order)`` of the orders at most `radius` away from `loc`,
+        nearest first and by id on ties."""
+        found = []
+        center = self._cell(loc)
+        for r in range(radius // self.cell_size + 2):
+            for cell in self._ring(center, r):
+                for order in cell.values():
+                    d = dist(loc, order.destination)
+                    if d <= radius:
+                        found.append((d, order.id, order))
+        found.sort(key=lambda item: item[:2])
+        return [(d, order) for d, _, order in found]
+
+    def nearest(self, loc: Location, k):
+        """Return the list of ``(distance, order)`` of the (at most) `k` orders closest to `loc`,
+        nearest first and by id on ties."""
+        if k <= 0:
+            return []
+        found = []
+        center = self._cell(loc)
+        max_r = max(center[0], self._n_rows - center[0], center[1], self._n_cols - center[1])
+        for r in range(max_r + 1):
+            for cell in self._ring(center, r):
+                for order in cell.values():
+                    found.append((dist(loc, order.destination), order.id, order))
+            found.sort(key=lambda item: item[:2])
+            # Orders outside the rings searched so far are more than r * cell_size away.
+            if len(found) >= k and found[k - 1][0] <= r * self.cell_size:
+                break
+        return [(d, order) for d, _, order in found[:k]]
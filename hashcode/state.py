@@ -0,0 +1,102 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+
+class DemandView(MutableMapping):
+    """
+    A dict-like view of an order's row in a demand matrix, mapping product type => number of missing items.
+
+    Only product types with missing items are iterated over, but every product type can be read and written.
+    """
+    __slots__ = ('_row',)
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, product_type):
+        return self._row[product_type]
+
+    def __setitem__(self, product_type, number_of_products):
+        self._row[product_type] = number_of_products
+
+    def __delitem__(self, product_type):
+        self._row[product_type] = 0
+
+    def __contains__(self, product_type):
+        return self._row[product_type] != 0
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self._row).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self._row))
+
+    def values(self):
+        return self._row[self._row != 0].tolist()
+
+    def items(self):
+        product_types = np.flatnonzero(self._row)
+        return list(zip(product_types.tolist(), self._row[product_types].tolist()))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class WorldState(object):
+    """
+    Array-backed (structure-of-arrays) state of the warehouses, orders and drones of an `InputData`.
+
+    * ``stock[w, p]`` - the number of items of product type `p` in warehouse `w`.
+    * ``demand[o, p]`` - the number of items of product type `p` still missing from order `o`.
+    * ``drone_products[d, p]`` - the number of items of product type `p` carried by drone `d`.
+
+    Use `attach` to turn the existing `Warehouse`, `Order` and `Drone` objects into views over these arrays,
+    after which the solver works on them unchanged and the arrays can be queried in bulk.
+    """
+
+    def __init__(self, input_data):
+        self.weights = np.array(input_data.weights, dtype=np.int32)
+        product_types = input_data.product_types
+        self.stock = np.array([w.list_of_products for w in input_data.warehouses], dtype=np.int32)
+        self.stock = self.stock.reshape(len(input_data.warehouses), product_types)
+        self.demand = np.zeros((input_data.orders_count, product_types), dtype=np.int32)
+        for order in input_data.orders:
+            for product_type, number_of_products in order.list_of_missing_products.items():
+                self.demand[order.id, product_type] = number_of_products
+        self.drone_products = np.array([d.list_of_products for d in input_data.drones], dtype=np.int32)
+        self.drone_products = self.drone_products.reshape(len(input_data.drones), product_types)
+
+    @classmethod
+    def attach(cls, input_data):
+        """Create the state of `input_data` and make its warehouses, orders and drones views over it."""
+        state = cls(input_data)
+        for w in input_data.warehouses:
+            w.list_of_products = state.stock[w.id]
+        for order in input_data.orders:
+            order.list_of_missing_products = DemandView(state.demand[order.id])
+        for drone in input_data.drones:
+            drone.list_of_products = state.drone_products[drone.id]
+        input_data.state = state
+        return state
+
+    def drone_loads(self):
+        """Return an array of the current load of every drone."""
+        return self.drone_products @ self.weights
+
+    def order_weights(self):
+        """Return an array of the total weight of the missing items of every order."""
+        return self.demand @ self.weights
+
+    def pending_orders(self):
+        """Return the ids of the orders that still have missing items."""
+        return np.flatnonzero(self.demand.any(axis=1))
+
+    def warehouses_covering(self, order_id):
+        """Return the ids of the warehouses that hold every missing item of the order."""
+        return np.flatnonzero((self.stock >= self.demand[order_id]).all(axis=1))
+
+    def orders_covered_by(self, warehouse_id):
+        """Return the ids of the pending orders whose missing items are all in stock in the warehouse."""
+        covered = (self.demand <= self.stock[warehouse_id]).all(axis=1)
+        return np.flatnonzero(covered & self.demand.any(axis=1))
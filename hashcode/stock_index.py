@@ -0,0 +1,57 @@
+from bisect import insort
+from typing import List
+
+import numpy as np
+
+from hashcode.warehouse import Warehouse
+
+
+class StockIndex(object):
+    """
+    For every product type, the ordered ids of the warehouses that have it in stock.
+
+    The indexed warehouses report their stock changes through `stocked` and `sold_out`
+    (see `Warehouse.get_items` and `Warehouse.give_items`), so the index is always up to date.
+    `version` is incremented on every change, for caches of anything derived from the index.
+    """
+
+    def __init__(self, warehouses: List[Warehouse], product_types):
+        stocked = np.array([w.list_of_products for w in warehouses]).reshape(len(warehouses), product_types) > 0
+        # The nonzero entries of the transpose come ordered by product type, then by warehouse.
+        product_idx, warehouse_idx = np.nonzero(stocked.T)
+        ids = [w.id for w in warehouses]
+        holders = [ids[i] for i in warehouse_idx.tolist()]
+        ends = np.cumsum(np.bincount(product_idx, minlength=product_types)).tolist()
+        self._holders = [holders[start:end] for start, end in zip([0] + ends[:-1], ends)]
+        for w in warehouses:
+            w.stock_index = self
+        self.version = 0
+
+    def warehouses_with(self, product_type):
+        """Return the ordered ids of the warehouses that have the product type in stock."""
+        return self._holders[product_type]
+
+    def stocked(self, warehouse_id, product_type):
+        insort(self._holders[product_type], warehouse_id)
+        self.version += 1
+
+    def sold_out(self, warehouse_id, product_type):
+        self._holders[product_type].remove(warehouse_id)
+        self.version += 1
+
+    def closest(self, product_type, detours):
+        """
+        Return the id of the warehouse with the product type in stock that has the smallest detour.
+
+        Args:
+            product_type: The product type to look for.
+            detours: An array of the detour through every warehouse, indexed by warehouse id.
+
+        Returns:
+            The warehouse id, the smallest one on ties, or None if no warehouse has the product type in stock.
+        """
+        holders = self._holders[product_type]
+        if not holders:
+            return None
+        # min keeps the first of equal items, and the holders are ordered by id.
+        return min(holders, key=detours.item)
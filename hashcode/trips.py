@@ -0,0 +1,139 @@
+from hashcode.product import Product
+
+
+def nearby_orders(input_data, order, max_dist):
+    """
+    Yield the pending orders other than `order` whose destination is at most `max_dist` away from its
+    destination, nearest first.
+    """
+    for _, other in input_data.order_grid.within(order.destination, max_dist):
+        if other is not order and other.remaining_items > 0:
+            yield other
+
+
+def plan_trip(input_data, drone, warehouse, orders, max_orders=1):
+    """
+    Plan loading the drone at the warehouse with the missing items of the orders, in the given order of priority,
+    as far as the stock and the drone's capacity allow. Nothing is changed until the plan is passed to
+    `load_trip`.
+
+    Args:
+        orders: An iterable of orders. Consumed only until the drone is full or `max_orders` orders got items.
+        max_orders: The maximal number of orders to load items for.
+
+    Returns:
+        A list of ``(order, {product_type: number_of_products})`` of what to load for which order.
+    """
+    capacity = input_data.max_load - drone.current_load
+    loads = {}
+    allocations = []
+    for order in orders:
+        if len(allocations) == max_orders or capacity <= 0:
+            break
+        allocation = {}
+        for product_type, missing in order.list_of_missing_products.items():
+            weight = input_data.weights[product_type]
+            quantity = min(
+                warehouse.list_of_products[product_type] - loads.get(product_type, 0),
+                missing,
+                capacity // weight
+            )
+            if quantity > 0:
+                allocation[product_type] = quantity
+                loads[product_type] = loads.get(product_type, 0) + quantity
+                capacity -= quantity * weight
+        if allocation:
+            allocations.append((order, allocation))
+    return allocations
+
+
+def _loads(allocations):
+    """Return a dict of product type => number of products to load for the allocations."""
+    loads = {}
+    for _, allocation in allocations:
+        for product_type, quantity in allocation.items():
+            loads[product_type] = loads.get(product_type, 0) + quantity
+    return loads
+
+
+def _tour(input_data, start, allocations):
+    """Return the allocations in the order of delivery, always flying to the nearest destination not yet visited."""
+    tour = []
+    allocations = list(allocations)
+    loc = start
+    while allocations:
+        nearest = min(range(len(allocations)),
+                      key=lambda i: input_data.distances.dist(loc, allocations[i][0].destination))
+        tour.append(allocations.pop(nearest))
+        loc = tour[-1][0].destination
+    return tour
+
+
+def trip_turns(input_data, drone, warehouse, allocations):
+    """Return the number of turns `load_trip` and `deliver_trip` would take for the planned allocations."""
+    dist = input_data.distances.dist
+    turns = dist(drone.loc, warehouse.loc) + len(_loads(allocations))
+    loc = warehouse.loc
+    for order, allocation in _tour(input_data, warehouse.loc, allocations):
+        turns += dist(loc, order.destination) + len(allocation)
+        loc = order.destination
+    return turns
+
+
+def fit_trip(input_data, drone, warehouse, allocations, max_turns):
+    """
+    Shrink the planned allocations until the trip takes at most `max_turns`, dropping the other orders of a batch
+    from the last one, and then the product types of the first order from the last one.
+
+    Returns:
+        The allocations that fit, possibly none, and the number of turns their trip takes.
+    """
+    allocations = list(allocations)
+    turns = trip_turns(input_data, drone, warehouse, allocations)
+    while allocations and turns > max_turns:
+        order, allocation = allocations[-1]
+        if len(allocations) > 1 or len(allocation) == 1:
+            allocations.pop()
+        else:
+            allocations[-1] = order, dict(list(allocation.items())[:-1])
+        turns = trip_turns(input_data, drone, warehouse, allocations) if allocations else 0
+    return allocations, turns
+
+
+def load_trip(input_data, drone, warehouse, allocations):
+    """
+    Load the drone at the warehouse as planned by `plan_trip`, supplying the orders.
+
+    Items of the same product type are loaded with a single command even if they are for several orders.
+
+    Returns:
+        The number of turns the loading takes.
+    """
+    for order, allocation in allocations:
+        for product_type, quantity in allocation.items():
+            order.supply(Product(product_type, input_data.weights[product_type]), quantity)
+
+    turns = 0
+    loads = _loads(allocations)
+    for product_type in sorted(loads):
+        turns += drone.load(warehouse, Product(product_type, input_data.weights[product_type]), loads[product_type])
+        warehouse.give_items(product_type, loads[product_type])
+    return turns
+
+
+def deliver_trip(input_data, drone, allocations):
+    """
+    Deliver the loaded items, always flying to the nearest destination not yet visited.
+
+    Args:
+        allocations: A list of ``(order, {product_type: number_of_products})`` as returned by `plan_trip`.
+
+    Returns:
+        The number of turns the deliveries take.
+    """
+    turns = 0
+    for order, allocation in _tour(input_data, drone.loc, allocations):
+        for product_type, number_of_products in allocation.items():
+            product = Product(product_type, input_data.weights[product_type])
+            turns += drone.deliver(order=order, product=product, number_of_products=number_of_products)
+    return turns
@@ -7,6 +7,8 @@ class Warehouse(object):
         self.id = id
         self.loc = location
         self.list_of_products = list_of_products
+        # An optional `hashcode.stock_index.StockIndex` to notify about stock changes.
+        self.stock_index = None
 
     def __str__(self):
        return 'Warehouse' + str(self.id) + ' in ' + str(self.loc)
@@ -16,7 +18,12 @@ class Warehouse(object):
 
     def get_items(self, product_type, number_of_products):
         self.list_of_products[product_type] += number_of_products
+        if self.stock_index is not None and number_of_products > 0 \
+                and self.list_of_products[product_type] == number_of_products:
+            self.stock_index.stocked(self.id, product_type)
 
     def give_items(self, product_type, number_of_products):
         self.list_of_products[product_type] -= number_of_products
         assert(self.list_of_products[product_type] >= 0)
+        if self.stock_index is not None and number_of_products > 0 and self.list_of_products[product_type] == 0:
+            self.stock_index.sold_out(self.id, product_type)
@@ -1,88 +1,328 @@
 from hashcode import PROJECT_DIR
-from hashcode.location import dist
-from hashcode.product import Product
-from hashcode.input_data import InputData
-from basics import read
+from hashcode.checkpoint import SolverState, load_checkpoint, save_checkpoint
+from hashcode.config import SolverConfig, parse_field
+from hashcode.input_cache import CACHE_DIR, load_input
+from hashcode.local_search import improve
+from hashcode.order_queue import OrderQueue
+from hashcode.output import write_commands
+from hashcode.profiling import profiler
+from hashcode.restock import plan_restocking, release, reserve, run_restock_trip
+from hashcode.scoring import OrderScorer
+from hashcode.scheduler import DroneScheduler
+from hashcode.simulate import simulate_file
+from hashcode.trips import deliver_trip, fit_trip, load_trip, nearby_orders, plan_trip
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import cProfile
+import collections
+import glob
+import heapq
+import itertools
 import os.path
+import sys
+import time
 
 
-def main():
-    path = 'redundancy.in'
-    name = os.path.basename(path)
-    input_data = InputData._from_text(read(os.path.join(PROJECT_DIR, 'input_files', name)))
-    available_drones = [[] for _ in range(input_data.deadline)]
-    available_drones[0] = [i for i in range(input_data.drones_count)]
-    # for order in input_data.orders:
-    #     print(order)
-    input_data.orders = sorted(input_data.orders, key=lambda o: sum(o.list_of_missing_products.values()))
-    for t in range(input_data.deadline):
-        for d in available_drones[t]:
-            used_drone = False
-            drone = input_data.drones[d]
-            for order in input_data.orders:
-                if used_drone:
+def _dispatch(input_data, drone, order, time_left, batch_orders=1, batch_radius=0, warehouse_choice='detour'):
+    """
+    Send the drone on a trip for the order if any of its missing products is in stock.
+
+    The drone loads at the stocked warehouse with the smallest detour, or with ``warehouse_choice='nearest'``
+    at the stocked warehouse closest to it. With `batch_orders` > 1, the remaining
+    capacity is filled with items for up to ``batch_orders - 1`` other pending orders whose destinations are
+    at most `batch_radius` away, and all of them are delivered in one tour.
+
+    The trip is planned up front and shrunk if needed (see `hashcode.trips.fit_trip`), so that it's over
+    within `time_left` turns.
+
+    Returns:
+        The number of turns the trip takes and the list of orders that were supplied,
+        or None if no warehouse stocks any of the missing products or no trip fits in the time left.
+    """
+    distances = input_data.distances
+    with profiler.timer('select warehouse'):
+        detours = distances.warehouses_from(drone.loc)
+        if warehouse_choice == 'detour':
+            detours = detours + distances.warehouse_to_order[:, order.id]
+        w = None
+        for prod_idx, missing in order.list_of_missing_products.items():
+            if missing > 0:
+                w_idx = input_data.stock_index.closest(prod_idx, detours)
+                if w_idx is not None:
+                    w = input_data.warehouses[w_idx]
                     break
-                for prod_idx in order.list_of_missing_products:
-                    if used_drone:
-                        break
-                    # print('order' + str(order))
-                    # print('product' + str(prod_idx))
-                    if (not used_drone) and order.list_of_missing_products[prod_idx] > 0:
-                        product = Product(prod_idx, input_data.weights[prod_idx])
-                        warehouse_lst = sorted(input_data.warehouses,
-                                               key=lambda w: dist(w.loc, drone.loc) + dist(w.loc, order.destination))
-                        for w in warehouse_lst:
-                            # print(w)
-                            if w.list_of_products[prod_idx] > 0:
-                                turns1 = 0
-                                for specific_prod_idx in order.list_of_missing_products:
-                                    product_spec = Product(specific_prod_idx, input_data.weights[specific_prod_idx])
-                                    quantity = min(
-                                        [
-                                            w.list_of_products[specific_prod_idx],
-                                            order.list_of_missing_products[specific_prod_idx],
-                                            (input_data.max_load - drone.current_load) // product_spec.weight
-                                        ]
-                                    )
-                                    if quantity > 0:
-                                        order.supply(product_spec, quantity)
-                                        turns1 += drone.load(w, product_spec, quantity)
-                                        w.give_items(specific_prod_idx, quantity)
-                                turns2 = 0
-                                for idx, quan in enumerate(drone.list_of_products):
-                                    if quan > 0:
-                                        product_spec = Product(idx, input_data.weights[idx])
-                                        turns2 += drone.deliver(
-                                            order=order, product=product_spec, number_of_products=quan)
-
-                                if t + turns1 + turns2 < input_data.deadline:
-                                        available_drones[t + turns1 + turns2].append(d)
-                                elif t + turns1 + turns2 > input_data.deadline:
-                                    drone.list_of_commands = drone.list_of_commands[:-1]
-                                used_drone = True
-
-                                break
-            for order in input_data.orders:
-                order.clean()
-            input_data.orders = [o for o in input_data.orders if len(o.list_of_missing_products) >0]
-            input_data.orders = sorted(input_data.orders, key=lambda o: sum(o.list_of_missing_products.values()))
-            if not used_drone and t < input_data.deadline - 1:
-                available_drones[t+1].append(d)
-
-    out_stream = ""
-    count = 0
-    for d in input_data.drones:
-        commands = d.dump_commands()
-        out_stream += "".join(commands)
-        count += len(commands)
-    out_stream = str(count) + "\n" + out_stream
-    out_path = os.path.join(PROJECT_DIR, 'outputs', name[:-3] + '.out')
-    with open(out_path, 'w+') as out_file:
-        out_file.write(out_stream)
+    if w is None:
+        profiler.count('orders out of stock')
+        return None
+
+    with profiler.timer('generate commands'):
+        orders = [order]
+        if batch_orders > 1:
+            orders = itertools.chain(orders, nearby_orders(input_data, order, batch_radius))
+        allocations, turns = fit_trip(input_data, drone, w, plan_trip(input_data, drone, w, orders, batch_orders),
+                                      time_left)
+        if not allocations:
+            profiler.count('trips out of time')
+            return None
+        load_trip(input_data, drone, w, allocations)
+        deliver_trip(input_data, drone, allocations)
+    profiler.count('trips')
+    profiler.count('orders per trip', len(allocations))
+    return turns, [o for o, _ in allocations]
+
+
+def solve(input_data, config=SolverConfig(), checkpoint_path=None, checkpoint_interval=60, resume=False,
+          save=save_checkpoint):
+    """
+    Greedily fill the drones' command lists, tuned by a `SolverConfig` (its `improve_seconds` is left to
+    `solve_file`).
+
+    Instead of walking every turn, the drones are kept in a `DroneScheduler` and the solver jumps straight
+    from one drone becoming free to the next. Orders are served fewest missing items first from an `OrderQueue`,
+    or with ``order_selection='quickest'``, quickest to complete by the free drone first as estimated by an
+    `OrderScorer`. See `_dispatch` for the rest. Afterwards ``input_data.orders`` holds the orders that are
+    still pending.
+
+    If `restock_distance` is not None, the first `restock_drones` drones fly the trips of
+    ``hashcode.restock.plan_restocking(input_data, restock_distance)`` before delivering, while the others
+    deliver from the start. The items of the trips are reserved up front and can be loaded for orders once the
+    unloading turn is over. Trips that the next free restocking drone can't finish within the first
+    `restock_until` share of the deadline are dropped, and their items released.
+
+    With a `checkpoint_path`, the state of the run is saved there every `checkpoint_interval` seconds
+    by calling `save`, which takes the same arguments as `hashcode.checkpoint.save_checkpoint`. With `resume`,
+    a run saved there earlier is carried on from where it was, if there is one; the other arguments should be
+    the same as the first time.
+    """
+    if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+        state = load_checkpoint(checkpoint_path, input_data)
+        state = state._replace(restock_trips=collections.deque(state.restock_trips))
+    else:
+        scheduler = DroneScheduler(input_data.deadline)
+        for d in range(input_data.drones_count):
+            scheduler.push(0, d)
+        restock_trips = collections.deque()
+        if config.restock_distance is not None:
+            restock_trips.extend(plan_restocking(input_data, config.restock_distance))
+            reserve(input_data, restock_trips)
+        state = SolverState(scheduler, OrderQueue(input_data.orders), restock_trips, [])
+    # arrivals is a heap of (turn, warehouse_id, product_type, number_of_products) of items on their way.
+    scheduler, order_queue, restock_trips, arrivals = state
+    scorer = OrderScorer(input_data) if config.order_selection == 'quickest' else None
+    restock_end = int(input_data.deadline * config.restock_until)
+    next_checkpoint = time.perf_counter() + checkpoint_interval
+    while scheduler:
+        if checkpoint_path is not None and time.perf_counter() >= next_checkpoint:
+            with profiler.timer('checkpoint'):
+                save(checkpoint_path, input_data, state)
+            next_checkpoint = time.perf_counter() + checkpoint_interval
+        t, d = scheduler.pop()
+        while arrivals and arrivals[0][0] <= t:
+            _, w_idx, prod_idx, number_of_products = heapq.heappop(arrivals)
+            input_data.warehouses[w_idx].get_items(prod_idx, number_of_products)
+        drone = input_data.drones[d]
+
+        restock_trip = None
+        if d < config.restock_drones:
+            restock_trip = _next_restock_trip(input_data, drone, restock_trips, restock_end - t)
+        if restock_trip is not None:
+            with profiler.timer('restock'):
+                turns, unloads = run_restock_trip(input_data, drone, restock_trip)
+            profiler.count('restock trips')
+            for arrival, prod_idx, number_of_products in unloads:
+                heapq.heappush(arrivals, (t + arrival, restock_trip.destination, prod_idx, number_of_products))
+            scheduler.push(t + turns, d)
+            continue
+
+        trip = None
+        candidates = order_queue if scorer is None else scorer.ranked(drone.loc)
+        for order in profiler.timed('select order', candidates):
+            trip = _dispatch(input_data, drone, order, input_data.deadline - t, config.batch_orders,
+                             config.batch_radius, config.warehouse_choice)
+            if trip is not None:
+                break
+        if trip is None:
+            # Stock, demand and time only ever shrink until more items arrive or restocking trips are dropped,
+            # so a drone that finds nothing to do now won't before then. The trips are all flown or dropped
+            # by the turn after `restock_end`.
+            profiler.count('idle drones')
+            wake = arrivals[0][0] if arrivals else None
+            if restock_trips and (wake is None or wake > max(t, restock_end) + 1):
+                wake = max(t, restock_end) + 1
+            if wake is not None and wake < input_data.deadline:
+                drone.wait(wake - t)
+                scheduler.push(wake, d)
+            continue
+        turns, supplied_orders = trip
+        scheduler.push(t + turns, d)
+        for order in supplied_orders:
+            order.clean()
+        order_queue.update(supplied_orders)
+        if scorer is not None:
+            scorer.update(supplied_orders)
+    # The drones ran out of time before flying or dropping every trip, or before the last items arrived.
+    release(input_data, restock_trips)
+    restock_trips.clear()
+    for _, w_idx, prod_idx, number_of_products in arrivals:
+        input_data.warehouses[w_idx].get_items(prod_idx, number_of_products)
+    arrivals.clear()
+    input_data.orders = list(order_queue)
+    return input_data.drones
+
+
+def _next_restock_trip(input_data, drone, restock_trips, time_left):
+    """
+    Pop the first restocking trip that the drone can fly within `time_left` turns, or return None if there is
+    none. The trips before it are dropped and their items released, so that a trip that doesn't fit in time
+    never holds up the others or keeps its items out of stock.
+    """
+    while restock_trips:
+        restock_trip = restock_trips.popleft()
+        if _restock_turns(input_data, drone, restock_trip) <= time_left:
+            return restock_trip
+        release(input_data, [restock_trip])
+        profiler.count('dropped restock trips')
+    return None
+
+
+def _restock_turns(input_data, drone, restock_trip):
+    """Return the number of turns a restocking trip would take the drone."""
+    distances = input_data.distances
+    source = input_data.warehouses[restock_trip.source]
+    destination = input_data.warehouses[restock_trip.destination]
+    return (distances.dist(drone.loc, source.loc) + distances.dist(source.loc, destination.loc)
+            + 2 * len(restock_trip.loads))
+
+
+def find_input(path):
+    """
+    Return the path of an input file. Names such as ``busy_day`` or ``busy_day.in`` that aren't existing paths
+    are looked up in the project's ``input_files`` directory.
+    """
+    if not os.path.exists(path):
+        path = os.path.join(PROJECT_DIR, 'input_files', path)
+        if not path.endswith('.in'):
+            path += '.in'
+    return path
+
+
+def solve_file(path, config=SolverConfig(), output_dir=None, checkpoint_interval=None, resume=False,
+               input_cache=True, profile=False, cprofile_dir=None):
+    """
+    Solve an input file and write the commands to ``<output_dir>/<name>.out``.
+
+    Args:
+        path: The input file, see `find_input`.
+        config: A `SolverConfig`.
+        output_dir: Defaults to the project's ``outputs`` directory.
+        checkpoint_interval: If given, checkpoint the run to ``<output_dir>/<name>.checkpoint.npz`` every that
+            many seconds.
+        resume: Carry on from the checkpoint of an earlier run if there is one.
+        input_cache: Whether to load the input through `hashcode.input_cache`.
+        profile: Whether to time the phases of the run with `hashcode.profiling.profiler`.
+        cprofile_dir: If given, the run is also profiled by cProfile and the stats are dumped to
+            ``<cprofile_dir>/<name>.prof``.
+
+    Returns:
+        A tuple of the input name, the seconds it took to solve and write, the `SimulationResult` of the output,
+        and the `Profiler.stats` of the run if `profile` is true, otherwise None.
+    """
+    path = find_input(path)
+    if output_dir is None:
+        output_dir = os.path.join(PROJECT_DIR, 'outputs')
+    name = os.path.basename(path)
+    profiler.reset()
+    if profile:
+        profiler.enable()
+    cprofile = None
+    if cprofile_dir is not None:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        elapsed, out_path = _solve_and_write(path, name, config, output_dir, checkpoint_interval, resume,
+                                             input_cache)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(os.path.join(cprofile_dir, os.path.splitext(name)[0] + '.prof'))
+    with profiler.timer('simulate'):
+        result = simulate_file(path, out_path, CACHE_DIR if input_cache else None)
+    stats = profiler.stats() if profile else None
+    profiler.disable()
+    return name, elapsed, result, stats
+
+
+def _solve_and_write(path, name, config, output_dir, checkpoint_interval, resume, input_cache):
+    """Do the work of `solve_file` and return the seconds it took and the path of the output file."""
+    start_time = time.perf_counter()
+    cache_dir = CACHE_DIR if input_cache else None
+    input_data = load_input(path, cache_dir)
+    checkpoint_path = None
+    if checkpoint_interval is not None or resume:
+        checkpoint_path = os.path.join(output_dir, os.path.splitext(name)[0] + '.checkpoint.npz')
+    with profiler.timer('solve'):
+        solve(input_data, config, checkpoint_path, 60 if checkpoint_interval is None else checkpoint_interval,
+              resume)
+    if config.improve_seconds > 0:
+        with profiler.timer('improve'):
+            improve(input_data, config.improve_seconds)
+
+    out_path = os.path.join(output_dir, os.path.splitext(name)[0] + '.out')
+    with profiler.timer('write output'), open(out_path, 'w') as out_file:
+        write_commands(out_file, input_data.drones)
+    return time.perf_counter() - start_time, out_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve input files in parallel and print their scores.')
+    parser.add_argument('inputs', nargs='*',
+                        help='Input files or names in input_files/. Defaults to every file in input_files/.')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of worker processes. Defaults to the number of CPUs.')
+    parser.add_argument('-o', '--output-dir', default=None, help='Defaults to outputs/.')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='SETTING=VALUE',
+                        help='Set a field of the solver config, e.g. batch_orders=3, order_selection=quickest or '
+                             'improve_seconds=10. See hashcode.config.SolverConfig. Can be given several times.')
+    parser.add_argument('--checkpoint-interval', type=float, default=None, metavar='SECONDS',
+                        help='Save the solver state to <output dir>/<name>.checkpoint.npz this often.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Carry on from the saved solver state of an earlier run, if there is one.')
+    parser.add_argument('--no-input-cache', dest='input_cache', action='store_false',
+                        help='Always parse the input files instead of loading their cached binary form.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print how long every phase of the runs took, summed over the input files.')
+    parser.add_argument('--cprofile', default=None, metavar='DIR',
+                        help='Profile every run with cProfile and dump the stats to DIR/<name>.prof.')
+    args = parser.parse_args(argv)
+    config = SolverConfig()
+    for setting in args.set:
+        field, _, value = setting.partition('=')
+        try:
+            config = config._replace(**{field: parse_field(field, value)})
+        except ValueError as e:
+            parser.error(str(e))
+
+    paths = args.inputs or sorted(glob.glob(os.path.join(PROJECT_DIR, 'input_files', '*.in')))
+    total_score = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(solve_file, path, config, args.output_dir, args.checkpoint_interval,
+                                   args.resume, args.input_cache, args.profile, args.cprofile)
+                   for path in paths]
+        for future in as_completed(futures):
+            name, elapsed, result, stats = future.result()
+            if stats is not None:
+                profiler.merge(stats)
+            total_score += result.score
+            print('{:30} {:8.2f}s  score {:7}  {} orders completed'.format(
+                name, elapsed, result.score, result.completed_orders))
+            if result.violation is not None:
+                print('{:30} invalid output: {}'.format(name, result.violation))
+    print('{:30} {:>9}  score {:7}'.format('total', '', total_score))
+    if args.profile:
+        print()
+        print(profiler.summary())
     return 0
 
 
 if __name__ == '__main__':
-    print('Starting')
-    main()
-    print('Done')
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Evaluate many solver configurations on the input files in parallel and report the best one for every file.
+
+Run from the project directory, giving the values to try for any `SolverConfig` fields::
+
+    python sweep.py busy_day redundancy -g batch_orders=1,2,3 -g batch_radius=10,20,40 \
+        -g order_selection=fewest_items,quickest
+
+Every combination of the values is tried, or with ``--samples N`` a random sample of N of them.
+The inputs are parsed once, before the worker processes start. Workers are forked where possible, so they share
+the parsed inputs copy-on-write, and otherwise get a copy when they start. Either way every evaluation builds its
+own `InputData` from the shared binary form (see `InputData.to_array`), which is much faster than parsing.
+"""
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os.path
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from hashcode import PROJECT_DIR
+from hashcode.config import SolverConfig, parse_field
+from hashcode.input_cache import load_input
+from hashcode.input_data import InputData
+from hashcode.local_search import improve
+from hashcode.output import format_command
+from hashcode.simulate import simulate
+from main import find_input, solve
+
+# The binary form of every input file by name, set in every worker process by `_init_worker`.
+_inputs = {}
+
+
+def _init_worker(inputs):
+    global _inputs
+    _inputs = inputs
+
+
+def evaluate(name, config):
+    """
+    Solve an input with a configuration in a worker process.
+
+    Returns:
+        A tuple of the input name, the config, the seconds it took and the `SimulationResult`.
+    """
+    start_time = time.perf_counter()
+    input_data = InputData._from_array(_inputs[name])
+    solve(input_data, config)
+    if config.improve_seconds > 0:
+        improve(input_data, config.improve_seconds)
+    elapsed = time.perf_counter() - start_time
+    commands = [format_command(c) for d in input_data.drones for c in d.list_of_commands]
+    result = simulate(InputData._from_array(_inputs[name]), itertools.chain([str(len(commands))], commands))
+    return name, config, elapsed, result
+
+
+def configurations(grid, samples=None, seed=None):
+    """
+    Return the list of configs made of every combination of the values in `grid`, a dict of field => values,
+    or a random sample of `samples` of them.
+    """
+    fields = sorted(grid)
+    configs = [SolverConfig()._replace(**dict(zip(fields, values)))
+               for values in itertools.product(*(grid[f] for f in fields))]
+    if samples is not None and samples < len(configs):
+        configs = random.Random(seed).sample(configs, samples)
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the best solver configuration for every input file.')
+    parser.add_argument('inputs', nargs='*',
+                        help='Input files or names in input_files/. Defaults to every file in input_files/.')
+    parser.add_argument('-g', '--grid', action='append', default=[], metavar='SETTING=VALUE,...',
+                        help='Values to try for a field of the solver config, see hashcode.config.SolverConfig. '
+                             'Can be given several times.')
+    parser.add_argument('--samples', type=int, default=None,
+                        help='Only evaluate a random sample of this many configurations.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the random sample.')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Number of worker processes. Defaults to the number of CPUs.')
+    args = parser.parse_args(argv)
+
+    grid = {}
+    for setting in args.grid:
+        field, _, values = setting.partition('=')
+        try:
+            grid[field] = [parse_field(field, value) for value in values.split(',')]
+        except ValueError as e:
+            parser.error(str(e))
+    configs = configurations(grid, args.samples, args.seed)
+
+    paths = [find_input(path) for path in args.inputs] or \
+        sorted(glob.glob(os.path.join(PROJECT_DIR, 'input_files', '*.in')))
+    inputs = {os.path.basename(path): load_input(path).to_array() for path in paths}
+    print('{} configurations x {} inputs'.format(len(configs), len(inputs)))
+
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    best = {}
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=context,
+                             initializer=_init_worker, initargs=(inputs,)) as executor:
+        futures = [executor.submit(evaluate, name, config) for name in inputs for config in configs]
+        for future in as_completed(futures):
+            name, config, elapsed, result = future.result()
+            print('{:30} {:8.2f}s  score {:7}  {}'.format(name, elapsed, result.score, dict(config._asdict())))
+            if result.violation is not None:
+                print('{:30} invalid output: {}'.format(name, result.violation))
+            elif name not in best or result.score > best[name][0]:
+                best[name] = result.score, config
+
+    print()
+    for name, (score, config) in sorted(best.items()):
+        print('{:30} best score {:7}  {}'.format(name, score, dict(config._asdict())))
+    print('{:30} best score {:7}'.format('total', sum(score for score, _ in best.values())))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())